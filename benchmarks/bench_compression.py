@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+"""Size and time of FileStorage save() and reload() per compression codec
+
+Usage: ./benchmarks/bench_compression.py [number of objects]
+Runs from the repository root, in a temporary directory
+"""
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+
+settings = [(None, None), ("gzip", 1), ("gzip", 6), ("gzip", 9),
+            ("bz2", 1), ("bz2", 9), ("lzma", 0), ("lzma", 6)]
+
+
+def populate(n):
+    """fills the storage with n places and n reviews"""
+    storage = FileStorage()
+    for i in range(n):
+        place = Place()
+        place.name = "Place {}".format(i)
+        place.description = "A quiet room with a view of the bay. " * 8
+        place.city_id = place.user_id = "0" * 36
+        review = Review()
+        review.place_id = place.id
+        review.user_id = "0" * 36
+        review.text = "Great stay, would come back. " * 6
+    return storage
+
+
+def main(n):
+    """prints the file size, save time and read time of each setting"""
+    tmp = tempfile.TemporaryDirectory()
+    os.chdir(tmp.name)
+    storage = populate(n)
+    print("{:>6} {:>5} {:>9} {:>8} {:>8}".format(
+        "codec", "level", "size KiB", "save s", "read s"))
+    for codec, level in settings:
+        FileStorage._FileStorage__compression = codec
+        FileStorage._FileStorage__compression_level = level
+        start = time.perf_counter()
+        storage.save()
+        saved = time.perf_counter() - start
+        FileStorage._FileStorage__cache.clear()
+        start = time.perf_counter()
+        for record in storage._FileStorage__read("file.json"):
+            pass
+        loaded = time.perf_counter() - start
+        print("{:>6} {:>5} {:>9} {:>8.3f} {:>8.3f}".format(
+            codec or "none", "-" if level is None else level,
+            os.path.getsize("file.json") >> 10, saved, loaded))
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
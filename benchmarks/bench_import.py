@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""Start up time of the models package and the console, with a store of
+a given size on disk
+
+Usage: ./benchmarks/bench_import.py [number of objects]
+Runs from the repository root, in a temporary directory. Each command
+runs in a fresh interpreter and the best of a few runs is kept.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+commands = [
+    ("python", ["-c", "pass"], ""),
+    ("import models", ["-c", "import models"], ""),
+    ("sqlalchemy imported", ["-c", "import sys, models, console; "
+                             "print('sqlalchemy' in sys.modules)"], ""),
+    ("console quit", [os.path.join(root, "console.py")], "quit\n"),
+    ("console count", [os.path.join(root, "console.py")], "count State\n"),
+]
+
+
+def populate(n):
+    """writes a store of n states to file.json"""
+    code = ("from models.state import State\n"
+            "import models\n"
+            "for i in range({}):\n"
+            "    State().name = str(i)\n"
+            "models.storage.save()\n").format(n)
+    run(["-c", code], "")
+
+
+def run(args, stdin):
+    """runs python with args and returns its time and output"""
+    env = dict(os.environ, PYTHONPATH=root)
+    start = time.perf_counter()
+    done = subprocess.run([sys.executable] + args, input=stdin, env=env,
+                          capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, done.stdout.strip()
+
+
+def main(n, runs=5):
+    """prints the best time of each command"""
+    tmp = tempfile.TemporaryDirectory()
+    os.chdir(tmp.name)
+    populate(n)
+    print("{} objects, {} KiB".format(n, os.path.getsize("file.json") >> 10))
+    for name, args, stdin in commands:
+        best, out = min(run(args, stdin) for i in range(runs))
+        print("{:>20} {:>8.3f} s {}".format(
+            name, best, " ".join(out.replace("(hbnb)", " ").split())))
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
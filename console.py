@@ -6,10 +6,8 @@ import cmd
 import json
 import shlex
 import models
-from models import storage
-from models.engine.file_storage import FileStorage
-from models.engine.db_storage import DBStorage
-from models.base_model import BaseModel, Base
+from models.engine.snapshot_storage import export
+from models.base_model import BaseModel
 from models.user import User
 from models.place import Place
 from models.state import State
@@ -64,6 +62,8 @@ class BNBCommand(cmd.Cmd):
             print(new_instance.id)
         except NameError:
             print("** class doesn't exist **")
+        except PermissionError:
+            print("** storage is read-only **")
 
     def do_show(self, args):
         '''
@@ -77,21 +77,17 @@ class BNBCommand(cmd.Cmd):
         if len(args) == 1:
             print("** instance id missing **")
             return
-        storage = FileStorage()
-        storage.reload()
-        obj_dict = storage.all()
+        models.storage.refresh()
         try:
             eval(args[0])
         except NameError:
             print("** class doesn't exist **")
             return
-        key = args[0] + "." + args[1]
-        key = args[0] + "." + args[1]
-        try:
-            value = obj_dict[key]
-            print(value)
-        except KeyError:
+        value = models.storage.get(args[0], args[1])
+        if value is None:
             print("** no instance found **")
+        else:
+            print(value)
 
     def do_destroy(self, args):
         '''
@@ -106,20 +102,21 @@ class BNBCommand(cmd.Cmd):
             return
         class_name = args[0]
         class_id = args[1]
-        storage = FileStorage()
-        storage.reload()
-        obj_dict = storage.all()
+        models.storage.refresh()
         try:
             eval(class_name)
         except NameError:
             print("** class doesn't exist **")
             return
-        key = class_name + "." + class_id
-        try:
-            del obj_dict[key]
-        except KeyError:
+        value = models.storage.get(class_name, class_id)
+        if value is None:
             print("** no instance found **")
-        storage.save()
+            return
+        try:
+            models.storage.delete(value)
+            models.storage.save()
+        except PermissionError:
+            print("** storage is read-only **")
 
     def do_all(self, line):
         '''
@@ -127,21 +124,20 @@ class BNBCommand(cmd.Cmd):
             based or not on the class name.
         '''
         arg = shlex.split(line)
-        objects = storage.all()
-        if len(arg) < 1:
-            print("[", end="")
-            print(", ".join(str(objects[obj])
-                            for obj in objects), end="")
-            print("]")
+        if len(arg) > 0 and arg[0] not in self.group:
+            print("** class doesn't exist **")
+            return
+        cls = arg[0] if len(arg) > 0 else None
+        models.storage.refresh()
+        iterate = getattr(models.storage, "iter", None)
+        if iterate is None:
+            objects = models.storage.all(cls).values()
         else:
-            if arg[0] in self.group:
-                listclass = [str(objects[obj]) for obj in objects
-                             if objects[obj].__class__.__name__ == arg[0]]
-                print("[", end="")
-                print(", ".join(listclass), end="")
-                print("]")
-            else:
-                print("** class doesn't exist **")
+            objects = iterate(cls)
+        print("[", end="")
+        for i, obj in enumerate(objects):
+            print(", " if i else "", obj, sep="", end="")
+        print("]")
 
     def splitter(self, line):
         """ Function to split argument lines"""
@@ -156,8 +152,7 @@ class BNBCommand(cmd.Cmd):
             Update an instance based on the class name and id
             sent as args.
         '''
-        storage = FileStorage()
-        storage.reload()
+        models.storage.refresh()
         args = self.splitter(args)
         if len(args) == 0:
             print("** class name missing **")
@@ -176,11 +171,8 @@ class BNBCommand(cmd.Cmd):
         except NameError:
             print("** class doesn't exist **")
             return
-        key = args[0] + "." + args[1]
-        obj_dict = storage.all()
-        try:
-            obj_value = obj_dict[key]
-        except KeyError:
+        obj_value = models.storage.get(args[0], args[1])
+        if obj_value is None:
             print("** no instance found **")
             return
         try:
@@ -188,8 +180,42 @@ class BNBCommand(cmd.Cmd):
             args[3] = attr_type(args[3])
         except AttributeError:
             pass
-        setattr(obj_value, args[2], args[3])
-        obj_value.save()
+        old = dict(obj_value.__dict__)
+        try:
+            setattr(obj_value, args[2], args[3])
+            obj_value.save()
+        except PermissionError:
+            obj_value.__dict__.clear()
+            obj_value.__dict__.update(old)
+            print("** storage is read-only **")
+
+    def do_export(self, args):
+        '''
+            Compiles all instances into a read-only snapshot file that
+            worker processes can memory-map.
+        '''
+        models.storage.refresh()
+        try:
+            if len(args.strip()) == 0:
+                export(models.storage.all())
+            else:
+                export(models.storage.all(), args.strip())
+        except (OSError, TypeError, ValueError) as e:
+            print("** export failed: {} **".format(e))
+
+    def do_bgsave(self, args):
+        '''
+            Saves all instances in the background, without blocking
+            further commands.
+        '''
+        bgsave = getattr(models.storage, "bgsave", None)
+        if bgsave is None:
+            models.storage.save()
+            print("Saved")
+        elif bgsave():
+            print("Background saving started")
+        else:
+            print("Background save already in progress")
 
     def emptyline(self):
         '''
@@ -201,23 +227,14 @@ class BNBCommand(cmd.Cmd):
         '''
             Counts/retrieves the number of instances.
         '''
-        obj_list = []
-        storage = FileStorage()
-        storage.reload()
-        objects = storage.all()
+        models.storage.refresh()
         try:
             if len(args) != 0:
                 eval(args)
         except NameError:
             print("** class doesn't exist **")
             return
-        for key, val in objects.items():
-            if len(args) != 0:
-                if isinstance(val, eval(args)):
-                    obj_list.append(val)
-            else:
-                obj_list.append(val)
-        print(len(obj_list))
+        print(models.storage.count(args.strip()))
 
     def default(self, args):
         '''
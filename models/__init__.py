@@ -1,19 +1,59 @@
 #!/usr/bin/python3
-"""create a unique FileStorage instance for your application"""
-from models.engine.file_storage import FileStorage
-from models.engine.db_storage import DBStorage
-from models.base_model import BaseModel
-from models.user import User
-from models.state import State
-from models.city import City
-from models.amenity import Amenity
-from models.place import Place
-from models.review import Review
+"""create a unique storage instance for your application
+
+models.storage is created and loaded the first time it is used, and only
+the engine HBNB_TYPE_STORAGE selects is imported, so importing models
+stays cheap whatever the engine and the size of the store
+In db mode every model is imported up front, since the relationships of
+each mapping name the others
+"""
 import os
+import threading
+
+'''Accessing and storing environment variables'''
+storage_type = os.getenv("HBNB_TYPE_STORAGE")
+db_engine = os.getenv("HBNB_DB_ENGINE")
+__lock = threading.Lock()
+
+if storage_type == "db":
+    from models import user, state, city, amenity, place, review
+
+
+def storage_class():
+    """returns the storage class HBNB_TYPE_STORAGE and HBNB_DB_ENGINE
+    select, importing only its module
+    """
+    if storage_type == "db":
+        if db_engine == "sqlite":
+            from models.engine.sqlite_storage import SQLiteStorage
+            return SQLiteStorage
+        from models.engine.db_storage import DBStorage
+        return DBStorage
+    if storage_type == "dbm":
+        from models.engine.dbm_storage import DBMStorage
+        return DBMStorage
+    if storage_type == "snapshot":
+        from models.engine.snapshot_storage import SnapshotStorage
+        return SnapshotStorage
+    if storage_type == "bounded":
+        from models.engine.bounded_storage import BoundedStorage
+        return BoundedStorage
+    from models.engine.file_storage import FileStorage
+    return FileStorage
 
 
-if os.getenv("BNB_TYPE_STORAGE") == "db":
-    storage = DBStorage()
-else:
-    storage = FileStorage()
-storage.reload()
+def __getattr__(name):
+    """creates and loads models.storage the first time it is looked up
+    Args:
+        name: attribute of the module that was not found
+    """
+    global storage
+    if name != "storage":
+        raise AttributeError("module {!r} has no attribute {!r}".format(
+            __name__, name))
+    with __lock:
+        if "storage" not in globals():
+            instance = storage_class()()
+            storage = instance
+            instance.reload()
+    return storage
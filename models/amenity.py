@@ -1,8 +1,9 @@
 #!/usr/bin/python3
 """This is the amenity class"""
-from models.base_model import BaseModel, Base
-from sqlalchemy import Column, String
-from sqlalchemy.orm import relationship
+from models.base_model import BaseModel, Base, storage_type
+if storage_type == "db":
+    from sqlalchemy import Column, String
+    from sqlalchemy.orm import relationship
 
 
 class Amenity(BaseModel, Base):
@@ -12,7 +13,10 @@ class Amenity(BaseModel, Base):
         name: input name
         place_amenities: sqlalchemy relationship
     """
-    __tablename__ = "amenities"
-    name = Column(String(128), nullable=False)
-    place_amenities = relationship("Place", secondary="place_amenity",
-                                   viewonly=False)
+    if storage_type == "db":
+        __tablename__ = "amenities"
+        name = Column(String(128), nullable=False)
+        place_amenities = relationship("Place", secondary="place_amenity",
+                                       viewonly=False)
+    else:
+        name = None
@@ -2,12 +2,42 @@
 """This is the base model class for AirBnB"""
 import uuid
 import models
-from datetime import datetime
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime, timedelta
 import os
 
-Base = declarative_base()
+'''Accessing and storing environment variables'''
+storage_type = os.getenv("HBNB_TYPE_STORAGE")
+time_format = os.getenv("HBNB_TIME_FORMAT", "iso")
+epoch = datetime(1970, 1, 1)
+microsecond = timedelta(microseconds=1)
+
+if storage_type == "db":
+    from sqlalchemy.ext.declarative import declarative_base
+    from sqlalchemy import Column, String, DateTime
+    Base = declarative_base()
+else:
+    Base = object
+
+
+def parse_time(value):
+    """returns the datetime of a stored timestamp
+    Args:
+        value: ISO 8601 string, or integer microseconds since the epoch
+    """
+    if isinstance(value, int):
+        return epoch + timedelta(microseconds=value)
+    return datetime.fromisoformat(value)
+
+
+def format_time(value):
+    """returns the stored form of a datetime, an ISO 8601 string unless
+    HBNB_TIME_FORMAT is "epoch"
+    Args:
+        value: datetime to store
+    """
+    if time_format == "epoch":
+        return (value - epoch) // microsecond
+    return value.isoformat()
 
 
 class BaseModel:
@@ -15,9 +45,12 @@ class BaseModel:
     for other classes
     """
 
-    id = Column(String(60), primary_key=True, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow(), nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow(), nullable=False)
+    if storage_type == "db":
+        id = Column(String(60), primary_key=True, nullable=False)
+        created_at = Column(DateTime, default=datetime.utcnow(),
+                            nullable=False, index=True)
+        updated_at = Column(DateTime, default=datetime.utcnow(),
+                            nullable=False, index=True)
 
     def __init__(self, *args, **kwargs):
         """Instantiation of base model class
@@ -32,7 +65,7 @@ class BaseModel:
         if kwargs:
             for key, value in kwargs.items():
                 if key == "created_at" or key == "updated_at":
-                    value = datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f")
+                    value = parse_time(value)
                 if key != "__class__":
                     setattr(self, key, value)
             if 'id' not in kwargs.keys():
@@ -43,6 +76,19 @@ class BaseModel:
             self.created_at = self.updated_at = datetime.now()
             models.storage.new(self)
 
+    def __setattr__(self, name, value):
+        """sets an attribute and tells the storage engine about it, if it
+        has been loaded, since it cannot hold the object otherwise
+        Args:
+            name: attribute name
+            value: new value
+        """
+        old = self.__dict__.get(name)
+        super().__setattr__(name, value)
+        changed = getattr(vars(models).get("storage"), "changed", None)
+        if changed is not None:
+            changed(self, name, old)
+
     def __str__(self):
         """returns a string
         Return:
@@ -74,10 +120,10 @@ class BaseModel:
             returns a dictionary of all the key values in __dict__
         """
         my_dict = dict(self.__dict__)
-        if os.getenv("HBNB_TYPE_STORAGE") != "db":
+        if storage_type != "db":
             my_dict["__class__"] = str(type(self).__name__)
-            my_dict["created_at"] = self.created_at.isoformat()
-            my_dict["updated_at"] = self.updated_at.isoformat()
+            my_dict["created_at"] = format_time(self.created_at)
+            my_dict["updated_at"] = format_time(self.updated_at)
         if '_sa_instance_state' in my_dict.keys():
             del my_dict['_sa_instance_state']
 
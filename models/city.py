@@ -1,8 +1,9 @@
 #!/usr/bin/python3
 """This is the city class"""
-from models.base_model import BaseModel, Base
-from sqlalchemy import Column, Integer, String, ForeignKey
-from sqlalchemy.orm import relationship
+from models.base_model import BaseModel, Base, storage_type
+if storage_type == "db":
+    from sqlalchemy import Column, String, ForeignKey
+    from sqlalchemy.orm import relationship
 
 
 class City(BaseModel, Base):
@@ -13,7 +14,13 @@ class City(BaseModel, Base):
         name: input name
         places: Place objects that are connected to a City object
     """
-    __tablename__ = 'cities'
-    name = Column(String(128), nullable=False)
-    state_id = Column(String(60), ForeignKey("states.id"), nullable=False)
-    places = relationship('Place', backref='cities', cascade='all, delete')
+    if storage_type == "db":
+        __tablename__ = 'cities'
+        name = Column(String(128), nullable=False)
+        state_id = Column(String(60), ForeignKey("states.id"),
+                          nullable=False)
+        places = relationship('Place', backref='cities',
+                              cascade='all, delete')
+    else:
+        name = None
+        state_id = None
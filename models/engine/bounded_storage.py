@@ -0,0 +1,417 @@
+#!/usr/bin/python3
+"""Storage engine keeping a bounded number of objects in memory
+
+Records live in an append-only log of framed entries (see serializers):
+    header: magic of the record format, then a random log id
+    entries: (key length, record length) key record, a record length of
+        0 marks the key as deleted
+The key -> (offset, length) index of the live entries is checkpointed
+next to the log, with the log id and size it covers, so a restart only
+scans the entries appended since. Only the most recently used objects
+are kept decoded, the others are read back from the log on demand.
+"""
+import marshal
+import os
+from collections import OrderedDict
+from collections.abc import Mapping
+from contextlib import contextmanager
+from models.engine import serializers
+from models.base_model import BaseModel
+from models.user import User
+from models.state import State
+from models.city import City
+from models.amenity import Amenity
+from models.place import Place
+from models.review import Review
+
+'''Accessing and storing environment variables'''
+path = os.getenv("HBNB_BOUNDED_PATH", "file.rec")
+capacity = int(os.getenv("HBNB_BOUNDED_CACHE", "10000"))
+record_format = os.getenv("HBNB_BOUNDED_FORMAT", "marshal")
+class_dict = {"BaseModel": BaseModel, "User": User, "State": State,
+              "City": City, "Place": Place, "Amenity": Amenity,
+              "Review": Review}
+frame = serializers.frame
+
+
+class Records(Mapping):
+    """Live read-only view of stored objects, each object is read when it
+    is looked up, so iterating over the view holds one at a time
+    """
+
+    def __init__(self, load, groups):
+        """Method to set up the view
+        Args:
+            load: function returning the object of a key
+            groups: dictionaries whose keys are the keys in the view
+        """
+        self.__load = load
+        self.__groups = groups
+
+    def __getitem__(self, key):
+        """returns the object of key"""
+        for keys in self.__groups:
+            if key in keys:
+                return self.__load(key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        """yields the keys in the view"""
+        for keys in self.__groups:
+            yield from list(keys)
+
+    def __len__(self):
+        """returns the number of keys in the view"""
+        return sum(len(keys) for keys in self.__groups)
+
+
+class BoundedStorage:
+    """This class serves a store larger than memory from a record log,
+    keeping at most __capacity decoded objects
+    Attributes:
+        __path: path of the record log, the index is __path + ".idx"
+        __capacity: number of objects kept decoded
+        __serializer: framed record format of the log
+        __file: open log file
+        __log_id: random id written in the log header
+        __size: size of the log
+        __garbage: bytes of the log taken by overwritten or deleted
+            entries
+        __unindexed: number of entries appended since the checkpoint
+        __index: key -> (offset, length) of the live entry of each key
+        __objects: decoded objects, least recently used first
+        __classes: class name -> {key: None} of every stored key
+        __pending: keys created, updated (None for deleted) and not
+            written to the log yet
+        __depth: number of open transaction() blocks
+        __deferred: whether save() was called inside a transaction
+    """
+
+    def __init__(self, path=path, capacity=capacity,
+                 record_format=record_format):
+        """Method to set up the storage
+        Args:
+            path: path of the record log
+            capacity: number of objects kept decoded
+            record_format: framed serializer name, see serializers
+        """
+        self.__serializer = serializers.get(record_format)
+        if not self.__serializer.magic:
+            raise ValueError("{} records are not framed".format(
+                record_format))
+        self.__path = path
+        self.__capacity = capacity
+        self.__file = None
+        self.__log_id = b""
+        self.__size = 0
+        self.__garbage = 0
+        self.__unindexed = 0
+        self.__index = {}
+        self.__objects = OrderedDict()
+        self.__classes = {}
+        self.__pending = {}
+        self.__depth = 0
+        self.__deferred = False
+
+    def all(self, cls=None):
+        """returns a view of the objects of cls, or of all objects
+        Objects are read from the log as the view is visited
+        Args:
+            cls: optional class or class name to filter on
+        """
+        if cls:
+            if not isinstance(cls, str):
+                cls = cls.__name__
+            return Records(self.__load, [self.__classes.get(cls, {})])
+        return Records(self.__load, list(self.__classes.values()))
+
+    def all_by(self, cls, name, value):
+        """returns a dictionary of the objects of cls whose attribute
+        name equals value
+        """
+        return {key: obj for key, obj in self.all(cls).items()
+                if getattr(obj, name, None) == value}
+
+    def get(self, cls, id):
+        """returns the object of cls with the given id, or None"""
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        key = "{}.{}".format(cls, id)
+        if key not in self.__classes.get(cls, {}):
+            return None
+        return self.__load(key)
+
+    def count(self, cls=None):
+        """returns the number of objects of cls, or of all objects
+        Nothing is read from the log
+        """
+        if cls:
+            if not isinstance(cls, str):
+                cls = cls.__name__
+            return len(self.__classes.get(cls, {}))
+        return sum(len(keys) for keys in self.__classes.values())
+
+    def changed(self, obj, name, old=None):
+        """marks a decoded object as pending when one of its attributes
+        is set
+        """
+        key = "{}.{}".format(type(obj).__name__, obj.__dict__.get("id"))
+        if self.__objects.get(key) is obj:
+            self.__pending[key] = obj
+
+    def new(self, obj):
+        """adds obj to the storage
+        Args:
+            obj: given object
+        """
+        if obj:
+            cls = type(obj).__name__
+            key = "{}.{}".format(cls, obj.id)
+            self.__classes.setdefault(cls, {})[key] = None
+            self.__pending[key] = obj
+            self.__keep(key, obj)
+
+    def delete(self, obj=None):
+        """deletes obj from the storage if it is there"""
+        if obj:
+            cls = type(obj).__name__
+            key = "{}.{}".format(cls, obj.id)
+            self.__objects.pop(key, None)
+            self.__classes.get(cls, {}).pop(key, None)
+            self.__pending[key] = None
+
+    @contextmanager
+    def transaction(self):
+        """groups the saves made inside the block into a single save when
+        the block exits, and drops the changes of the block if it raises
+        Changes made before the block are saved when it begins, and
+        changed objects are not evicted until it ends
+        """
+        if self.__depth == 0:
+            self.save()
+        self.__depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.__depth -= 1
+            if self.__depth == 0:
+                self.__rollback()
+            raise
+        self.__depth -= 1
+        if self.__depth == 0 and self.__deferred:
+            self.save()
+
+    def save(self):
+        """appends the entries of the pending keys to the log
+        The index is checkpointed once the entries appended since the
+        last checkpoint outnumber half of it, and the log is compacted
+        once most of it is garbage
+        Inside a transaction the save is deferred until the block exits
+        """
+        if self.__depth:
+            self.__deferred = True
+            return
+        self.__deferred = False
+        for key, obj in self.__pending.items():
+            self.__append(key, obj)
+        self.__pending.clear()
+        self.__file.flush()
+        if self.__garbage > max(1 << 20, self.__size - self.__garbage):
+            self.compact()
+        elif self.__unindexed > max(1000, len(self.__index) // 2):
+            self.__checkpoint()
+        self.__evict()
+
+    def compact(self):
+        """rewrites the log with only its live entries
+        Pending changes stay pending
+        """
+        log_id = os.urandom(16)
+        tmp_path = self.__path + ".tmp"
+        index = {}
+        with open(tmp_path, 'wb') as f:
+            f.write(self.__serializer.magic + log_id)
+            for key, (offset, length) in self.__index.items():
+                self.__file.seek(offset)
+                index[key] = (f.tell(), length)
+                f.write(self.__file.read(length))
+            size = f.tell()
+        self.__file.close()
+        os.replace(tmp_path, self.__path)
+        self.__file = open(self.__path, 'r+b')
+        self.__log_id = log_id
+        self.__size = size
+        self.__garbage = 0
+        self.__index = index
+        self.__checkpoint()
+
+    def refresh(self):
+        """Nothing to do, the log is only written by this process"""
+        return False
+
+    def reload(self):
+        """opens the log, reads the checkpointed index and scans the
+        entries appended after it
+        No record is decoded until its object is asked for
+        """
+        self.close()
+        self.__objects.clear()
+        self.__classes.clear()
+        self.__pending.clear()
+        self.__index = {}
+        self.__garbage = 0
+        self.__unindexed = 0
+        magic = self.__serializer.magic
+        try:
+            self.__file = open(self.__path, 'r+b')
+        except FileNotFoundError:
+            self.__file = open(self.__path, 'w+b')
+            self.__file.write(magic + os.urandom(16))
+            self.__file.seek(0)
+        head = self.__file.read(len(magic) + 16)
+        if head[:len(magic)] != magic or len(head) < len(magic) + 16:
+            self.__file.close()
+            self.__file = None
+            raise ValueError("{} is not a {} record log".format(
+                self.__path, self.__serializer.name))
+        self.__log_id = head[len(magic):]
+        self.__size = self.__file.seek(0, os.SEEK_END)
+        offset = len(head)
+        try:
+            with open(self.__path + ".idx", 'rb') as f:
+                log_id, size, garbage, index = marshal.load(f)
+            if log_id == self.__log_id and size <= self.__size:
+                offset, self.__garbage, self.__index = size, garbage, index
+        except (FileNotFoundError, EOFError, ValueError, TypeError):
+            pass
+        self.__scan(offset)
+        for key in self.__index:
+            self.__classes.setdefault(key.partition('.')[0], {})[key] = None
+
+    def close(self):
+        """checkpoints the index and closes the log if it is open"""
+        if self.__file is not None:
+            self.__checkpoint()
+            self.__file.close()
+            self.__file = None
+
+    def __load(self, key):
+        """returns the object of key, reading its entry if it is not
+        decoded
+        """
+        obj = self.__objects.get(key)
+        if obj is None:
+            obj = self.__read(key)
+        self.__keep(key, obj)
+        return obj
+
+    def __read(self, key):
+        """builds a new object from the indexed entry of key in the log"""
+        offset, length = self.__index[key]
+        self.__file.seek(offset)
+        value = self.__serializer.decode(key, self.__file.read(length))
+        return class_dict[value["__class__"]](**value)
+
+    def __keep(self, key, obj):
+        """makes obj the most recently used object and evicts the least
+        recently used ones beyond __capacity
+        """
+        self.__objects[key] = obj
+        self.__objects.move_to_end(key)
+        self.__evict()
+
+    def __evict(self):
+        """drops the least recently used objects beyond __capacity,
+        appending the changed ones to the log first
+        Inside a transaction eviction stops at the first changed object
+        """
+        while len(self.__objects) > self.__capacity:
+            key, obj = next(iter(self.__objects.items()))
+            if key in self.__pending:
+                if self.__depth:
+                    return
+                self.__append(key, self.__pending.pop(key))
+            del self.__objects[key]
+
+    def __append(self, key, obj):
+        """appends the entry of obj, or a deletion if obj is None, to the
+        log and points the index at it
+        """
+        if obj is None:
+            if key not in self.__index:
+                return
+            data = key.encode()
+            entry = frame.pack(len(data), 0) + data
+        else:
+            entry = self.__serializer.entry(key, obj.to_dict())
+        self.__file.seek(self.__size)
+        self.__file.write(entry)
+        old = self.__index.pop(key, None)
+        if old is not None:
+            self.__garbage += old[1]
+        if obj is None:
+            self.__garbage += len(entry)
+        else:
+            self.__index[key] = (self.__size, len(entry))
+        self.__size += len(entry)
+        self.__unindexed += 1
+
+    def __scan(self, offset):
+        """indexes the entries of the log from offset to its end
+        A torn last entry left by a crash is cut off
+        """
+        f = self.__file
+        f.seek(offset)
+        while offset < self.__size:
+            head = f.read(frame.size)
+            if len(head) < frame.size:
+                break
+            key_length, length = frame.unpack(head)
+            end = offset + frame.size + key_length + length
+            if end > self.__size:
+                break
+            key = f.read(key_length).decode()
+            old = self.__index.pop(key, None)
+            if old is not None:
+                self.__garbage += old[1]
+            if length:
+                self.__index[key] = (offset, end - offset)
+                f.seek(length, os.SEEK_CUR)
+            else:
+                self.__garbage += end - offset
+            self.__unindexed += 1
+            offset = end
+        if offset < self.__size:
+            f.truncate(offset)
+            self.__size = offset
+
+    def __checkpoint(self):
+        """writes the index, with the log id and size it covers"""
+        tmp_path = self.__path + ".idx.tmp"
+        with open(tmp_path, 'wb') as f:
+            marshal.dump((self.__log_id, self.__size, self.__garbage,
+                          self.__index), f)
+        os.replace(tmp_path, self.__path + ".idx")
+        self.__unindexed = 0
+
+    def __rollback(self):
+        """puts the pending keys back to their entries in the log
+        Objects that are still decoded are restored in place, so their
+        holders keep the object the storage tracks
+        """
+        for key in self.__pending:
+            keys = self.__classes.setdefault(key.partition('.')[0], {})
+            obj = self.__objects.pop(key, None)
+            if key not in self.__index:
+                keys.pop(key, None)
+                continue
+            keys[key] = None
+            if obj is not None:
+                fresh = self.__read(key)
+                if type(obj) is type(fresh):
+                    obj.__dict__.clear()
+                    obj.__dict__.update(fresh.__dict__)
+                    self.__objects[key] = obj
+        self.__pending.clear()
+        self.__deferred = False
+        self.__evict()
@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+"""Optional compression of the file storage files
+
+Compressed files are recognised by the header of their codec, so a
+store reads the same whether or not it was compressed and whatever the
+codec it was compressed with.
+"""
+import bz2
+import gzip
+import lzma
+
+headers = {b"\x1f\x8b": "gzip", b"BZh": "bz2", b"\xfd7zXZ\x00": "lzma"}
+
+
+def open_write(f, codec=None, level=None):
+    """returns a file compressing what is written to it into f
+    Closing it leaves f open unless no codec is given and it is f
+    Args:
+        f: binary file to write to
+        codec: "gzip", "bz2", "lzma", or None to write f as it is
+        level: compression level, or None for the codec default
+    """
+    if not codec:
+        return f
+    options = {} if level is None else {"compresslevel": level}
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=f, mode='wb', mtime=0, **options)
+    if codec == "bz2":
+        return bz2.BZ2File(f, 'wb', **options)
+    if codec == "lzma":
+        return lzma.LZMAFile(f, 'wb', preset=level)
+    raise ValueError("unknown compression {}".format(codec))
+
+
+def open_read(f):
+    """returns a file reading f decompressed if its header names a codec,
+    or f itself
+    Args:
+        f: buffered binary file positioned at its start
+    """
+    head = f.peek(6)[:6]
+    for magic, codec in headers.items():
+        if head.startswith(magic):
+            if codec == "gzip":
+                return gzip.GzipFile(fileobj=f, mode='rb')
+            if codec == "bz2":
+                return bz2.BZ2File(f, 'rb')
+            return lzma.LZMAFile(f, 'rb')
+    return f
@@ -1,8 +1,12 @@
 #!/usr/bin/python3
 """New database storage engine"""
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, and_, or_
 from sqlalchemy.orm import sessionmaker, scoped_session
+import base64
+import json
 import os
+from contextlib import contextmanager
+from datetime import datetime
 from models.base_model import BaseModel, Base
 from models.city import City
 from models.state import State
@@ -24,14 +28,19 @@ class DBStorage():
     """New database storage class"""
     __engine = None
     __session = None
+    __depth = 0
 
     def __init__(self):
         """Method to create the new engine"""
-        self.__engine = create_engine("mysql+mysqldb://{}:{}@{}/{}".format(
-            user, passwd, host, database), pool_pre_ping=True)
+        self.__engine = self.make_engine()
         if os.getenv("HBNB_ENV") == "test":
             Base.metadata.drop_all(bind=self.__engine)
 
+    def make_engine(self):
+        """Returns the SQLAlchemy engine of the MySQL database"""
+        return create_engine("mysql+mysqldb://{}:{}@{}/{}".format(
+            user, passwd, host, database), pool_pre_ping=True)
+
     def all(self, cls=None):
         """Method to query for all objects of optional given class name.
         Return value is a dict like FileStorage
@@ -52,12 +61,132 @@ class DBStorage():
                     new_dict[key] = objs
         return new_dict
 
+    def iter(self, cls=None, batch_size=1000):
+        '''Yields the objects of the given class name, or of all classes,
+        fetching batch_size rows at a time so that a large table is never
+        held in memory at once'''
+        if cls:
+            if not isinstance(cls, str):
+                cls = cls.__name__
+            if cls not in class_dict:
+                return
+            classes = [class_dict[cls]]
+        else:
+            classes = class_dict.values()
+        for model in classes:
+            yield from self.__session.query(model).yield_per(batch_size)
+
+    def page(self, cls, after=None, limit=100, order_by="id"):
+        '''Returns a list of at most limit objects of the given class name
+        ordered by the indexed column order_by then id, and the cursor to
+        pass as after for the next page, None after the last page.
+        Pages seek past the last row of the previous one instead of
+        skipping rows, so any page costs the same as the first.
+        Raises ValueError for a limit below 1, a column without an index,
+        or a cursor that is not one of this class and order'''
+        if limit < 1:
+            raise ValueError("limit must be at least 1, not {}".format(
+                limit))
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if cls not in class_dict:
+            return [], None
+        model = class_dict[cls]
+        column = model.__table__.columns.get(order_by)
+        if column is None or not (column.primary_key or column.index):
+            raise ValueError("{} is not an indexed column of {}".format(
+                order_by, cls))
+        key, id = getattr(model, order_by), model.id
+        query = self.__session.query(model)
+        if after is not None:
+            value, last = self.__decode_cursor(after, cls, order_by)
+            if value is not None and column.type.python_type is datetime:
+                value = datetime.fromisoformat(value)
+            if order_by == "id":
+                query = query.filter(id > last)
+            elif value is None:
+                query = query.filter(or_(key.isnot(None),
+                                         and_(key.is_(None), id > last)))
+            else:
+                query = query.filter(or_(key > value,
+                                         and_(key == value, id > last)))
+        if order_by == "id":
+            query = query.order_by(id)
+        else:
+            query = query.order_by(key, id)
+        objs = query.limit(limit + 1).all()
+        if len(objs) <= limit:
+            return objs, None
+        objs = objs[:limit]
+        value = getattr(objs[-1], order_by)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        cursor = json.dumps([cls, order_by, value, objs[-1].id])
+        return objs, base64.urlsafe_b64encode(cursor.encode()).decode()
+
+    def __decode_cursor(self, cursor, cls, order_by):
+        '''Returns the (order_by value, id) of the last row of a page from
+        its cursor'''
+        try:
+            name, column, value, last = json.loads(
+                base64.urlsafe_b64decode(cursor.encode()))
+        except (TypeError, ValueError):
+            raise ValueError("invalid cursor")
+        if (name, column) != (cls, order_by):
+            raise ValueError("cursor of another class or order")
+        return value, last
+
+    def get(self, cls, id):
+        '''Returns the object of the given class name and id, or None'''
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if cls not in class_dict:
+            return None
+        return self.__session.get(class_dict[cls], id)
+
+    def count(self, cls=None):
+        '''Returns the number of rows of the given class name, or of all
+        classes'''
+        if cls:
+            if not isinstance(cls, str):
+                cls = cls.__name__
+            if cls not in class_dict:
+                return 0
+            return self.__session.query(class_dict[cls]).count()
+        return sum(self.__session.query(classes).count()
+                   for classes in class_dict.values())
+
+    def refresh(self):
+        '''Nothing to do, every query already reads the database'''
+        return False
+
     def new(self, obj):
         '''Adds the object given as an argument to the current db session'''
         self.__session.add(obj)
 
+    @contextmanager
+    def transaction(self):
+        '''Commits the changes made inside the block once when it exits,
+        or rolls them back if it raises. Nested blocks join the outermost
+        one'''
+        self.__depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.__depth -= 1
+            if self.__depth == 0:
+                self.__session.rollback()
+            raise
+        self.__depth -= 1
+        if self.__depth == 0:
+            self.__session.commit()
+
     def save(self):
-        '''Saves the changes to the current db session'''
+        '''Saves the changes to the current db session, unless inside a
+        transaction which commits them when it exits'''
+        if self.__depth:
+            self.__session.flush()
+            return
         self.__session.commit()
 
     def delete(self, obj=None):
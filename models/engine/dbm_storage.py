@@ -0,0 +1,217 @@
+#!/usr/bin/python3
+"""Key-value storage engine on top of the stdlib dbm module"""
+import dbm
+import json
+import os
+from contextlib import contextmanager
+from models.base_model import BaseModel
+from models.user import User
+from models.state import State
+from models.city import City
+from models.amenity import Amenity
+from models.place import Place
+from models.review import Review
+
+'''Accessing and storing environment variables'''
+path = os.getenv("HBNB_DBM_PATH", "file.dbm")
+class_dict = {"BaseModel": BaseModel, "User": User, "State": State,
+              "City": City, "Place": Place, "Amenity": Amenity,
+              "Review": Review}
+
+
+class DBMStorage:
+    """This class keeps one JSON record per "<Class>.<id>" key in a dbm
+    file, so reads and writes cost O(1) per object
+    Attributes:
+        __path: path of the dbm file
+        __db: open dbm handle
+        __objects: objects read or created so far
+        __classes: class name -> keys of that class in the file or memory
+        __pending: keys created, updated (None for deleted) since the
+            last save
+        __depth: number of open transaction() blocks
+        __deferred: whether save() was called inside a transaction
+    """
+
+    def __init__(self, path=path):
+        """Method to set up the storage
+        Args:
+            path: path of the dbm file
+        """
+        self.__path = path
+        self.__db = None
+        self.__objects = {}
+        self.__classes = {}
+        self.__pending = {}
+        self.__depth = 0
+        self.__deferred = False
+
+    def all(self, cls=None):
+        """returns a dictionary of the objects of cls, or of all objects
+        Objects are read from the file the first time they are asked for
+        Args:
+            cls: optional class or class name to filter on
+        """
+        if cls:
+            if not isinstance(cls, str):
+                cls = cls.__name__
+            names = [cls]
+        else:
+            names = list(self.__classes)
+        new_dict = {}
+        for name in names:
+            for key in self.__classes.get(name, ()):
+                new_dict[key] = self.__get(key)
+        return new_dict
+
+    def all_by(self, cls, name, value):
+        """returns a dictionary of the objects of cls whose attribute
+        name equals value
+        """
+        return {key: obj for key, obj in self.all(cls).items()
+                if getattr(obj, name, None) == value}
+
+    def get(self, cls, id):
+        """returns the object of cls with the given id, or None"""
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        key = "{}.{}".format(cls, id)
+        if key not in self.__classes.get(cls, ()):
+            return None
+        return self.__get(key)
+
+    def count(self, cls=None):
+        """returns the number of objects of cls, or of all objects
+        Nothing is read from the file
+        """
+        if cls:
+            if not isinstance(cls, str):
+                cls = cls.__name__
+            return len(self.__classes.get(cls, ()))
+        return sum(len(keys) for keys in self.__classes.values())
+
+    def changed(self, obj, name, old=None):
+        """marks a stored object as pending when one of its attributes
+        is set
+        """
+        key = "{}.{}".format(type(obj).__name__, obj.__dict__.get("id"))
+        if self.__objects.get(key) is obj:
+            self.__pending[key] = obj
+
+    def new(self, obj):
+        """adds obj to the storage
+        Args:
+            obj: given object
+        """
+        if obj:
+            cls = type(obj).__name__
+            key = "{}.{}".format(cls, obj.id)
+            self.__objects[key] = obj
+            self.__classes.setdefault(cls, set()).add(key)
+            self.__pending[key] = obj
+
+    def delete(self, obj=None):
+        """deletes obj from the storage if it is there"""
+        if obj:
+            cls = type(obj).__name__
+            key = "{}.{}".format(cls, obj.id)
+            self.__objects.pop(key, None)
+            self.__classes.get(cls, set()).discard(key)
+            self.__pending[key] = None
+
+    @contextmanager
+    def transaction(self):
+        """groups the saves made inside the block into a single save when
+        the block exits, and drops the changes of the block if it raises
+        Changes made before the block are saved when it begins
+        """
+        if self.__depth == 0:
+            self.save()
+        self.__depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.__depth -= 1
+            if self.__depth == 0:
+                self.__rollback()
+            raise
+        self.__depth -= 1
+        if self.__depth == 0 and self.__deferred:
+            self.save()
+
+    def save(self):
+        """writes the records of the pending keys only
+        Inside a transaction the save is deferred until the block exits
+        """
+        if self.__depth:
+            self.__deferred = True
+            return
+        self.__deferred = False
+        for key, obj in self.__pending.items():
+            if obj is not None:
+                self.__db[key] = json.dumps(obj.to_dict())
+            elif key in self.__db:
+                del self.__db[key]
+        self.__pending.clear()
+        if hasattr(self.__db, "sync"):
+            self.__db.sync()
+
+    def refresh(self):
+        """Nothing to do, the dbm file is only written by this process"""
+        return False
+
+    def reload(self):
+        """opens the dbm file and indexes its keys by class
+        No record is decoded until its object is asked for
+        """
+        self.close()
+        self.__db = dbm.open(self.__path, 'c')
+        self.__objects.clear()
+        self.__classes.clear()
+        self.__pending.clear()
+        for key in self.__db.keys():
+            key = key.decode()
+            self.__classes.setdefault(key.partition('.')[0],
+                                      set()).add(key)
+
+    def close(self):
+        """closes the dbm file if it is open"""
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
+
+    def __get(self, key):
+        """returns the object of key, decoding its record on first use"""
+        obj = self.__objects.get(key)
+        if obj is None:
+            obj = self.__read(key)
+            self.__objects[key] = obj
+        return obj
+
+    def __read(self, key):
+        """builds a new object from the record of key in the file"""
+        value = json.loads(self.__db[key])
+        return class_dict[value["__class__"]](**value)
+
+    def __rollback(self):
+        """puts the pending keys back to their records in the file, which
+        the transaction saved when it began
+        Objects that are still stored are restored in place, so their
+        holders keep the object the storage tracks
+        """
+        for key in self.__pending:
+            keys = self.__classes.setdefault(key.partition('.')[0], set())
+            if key not in self.__db:
+                self.__objects.pop(key, None)
+                keys.discard(key)
+                continue
+            keys.add(key)
+            obj = self.__objects.get(key)
+            fresh = self.__read(key)
+            if obj is not None and type(obj) is type(fresh):
+                obj.__dict__.clear()
+                obj.__dict__.update(fresh.__dict__)
+            else:
+                self.__objects[key] = fresh
+        self.__pending.clear()
+        self.__deferred = False
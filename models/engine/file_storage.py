@@ -1,13 +1,43 @@
 #!/usr/bin/python3
 """This is the file storage class for AirBnB"""
+import atexit
+import hashlib
 import json
-from models.base_model import BaseModel
+import marshal
+import os
+import pickle
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from models.base_model import BaseModel, format_time
 from models.user import User
 from models.state import State
 from models.city import City
 from models.amenity import Amenity
 from models.place import Place
 from models.review import Review
+from models.engine import compression, serializers, workers
+from models.engine.locks import FileLock, RWLock
+
+class_dict = {"BaseModel": BaseModel, "User": User, "State": State,
+              "City": City, "Amenity": Amenity, "Place": Place,
+              "Review": Review}
+
+'''Accessing the file storage options from the environment'''
+layout = os.getenv("HBNB_FILE_LAYOUT", "file")
+journal_limit = int(os.getenv("HBNB_JOURNAL_LIMIT", "1000"))
+shard_dir = os.getenv("HBNB_SHARD_DIR", "storage")
+lazy = os.getenv("HBNB_FILE_LAZY") == "1"
+file_format = os.getenv("HBNB_FILE_FORMAT", "json")
+file_compression = os.getenv("HBNB_FILE_COMPRESSION")
+file_compression_level = os.getenv("HBNB_FILE_COMPRESSION_LEVEL")
+if file_compression_level is not None:
+    file_compression_level = int(file_compression_level)
+file_workers = int(os.getenv("HBNB_FILE_WORKERS", "1"))
+file_chunk = int(os.getenv("HBNB_FILE_CHUNK", "10000"))
+startup_cache = os.getenv("HBNB_FILE_CACHE") == "1"
 
 
 class FileStorage:
@@ -16,22 +46,209 @@ class FileStorage:
     Attributes:
         __file_path: path to the JSON file
         __objects: objects will be stored
+        __classes: class name -> {key: object} index over __objects
+        __foreign_keys: class name -> attributes with a reverse index
+        __refs: (class name, attribute) -> {value: {key: object}}
+        __layout: "file" rewrites the whole JSON file on every save,
+            "journal" appends changes to __file_path + ".journal",
+            "sharded" keeps one JSON file per class in __shard_dir
+        __journal_limit: minimum number of journal records before the
+            journal is folded back into the JSON file
+        __pending: keys created, updated (None for deleted) since the
+            last save
+        __cache: key -> serialized entry of each object, dropped
+            whenever the object changes, so a save only encodes the
+            objects in __pending
+        __journal_size: number of records currently in the journal
+        __shard_dir: directory of the per class files in sharded layout
+        __loaded: class names whose shard has been read
+        __all_loaded: whether every shard on disk has been read
+        __depth: number of open transaction() blocks
+        __deferred: whether save() was called inside a transaction
+        __savepoint: key -> entry of each object touched in the open
+            transaction, as it was when it began, None if it did not
+            exist, see __mark()
+        __saved_pending: __pending as it was when the transaction began
+        __seen: path -> (mtime, size, inode) of each file as this process
+            last read or wrote it, None for a missing file
+        __lazy: whether reads keep records as entries and only build
+            their objects when they are asked for
+        __raw: class name -> {key: entry} of the records read but not
+            built yet in lazy mode
+        __serializer: format files are written in, see serializers
+        __compression: codec files are compressed with, None for none
+        __compression_level: level of __compression, None for its default
+        __lock: readers-writer lock guarding the attributes above, held to
+            read by lookups and to write by every change
+        __save_lock: serializes saves, so files are written in the order
+            their entries were taken
+        __file_lock: advisory lock on __file_path + ".lock", shared by
+            reloads and exclusive around the read-modify-write of saves,
+            so processes sharing the store do not overwrite each other
+        __generations: path -> generation of each file as this process
+            last read or wrote it, the counter each save of a file bumps
+            and writes as its first "__generation__" entry
+        __stats: statistics of the background saves, see stats()
+        __bgsave_thread: thread waiting for the child of the last
+            bgsave()
+        __workers: number of processes building the objects of reloads
+            and encoding the objects of saves, 1 to do it in this process
+        __chunk: number of records or objects handed to a worker at once
+        __startup_cache: whether reloads of the JSON file go through a
+            pickle of its objects in __file_path + ".cache", keyed by the
+            fingerprint of the file, see __fingerprint()
+        __cache_stale: whether the JSON file was saved since the startup
+            cache was last written
+        __exit_hook: whether __flush_cache() is registered to run at exit
     """
     __file_path = "file.json"
     __objects = {}
+    __classes = {}
+    __foreign_keys = {"City": ("state_id",),
+                      "Place": ("city_id", "user_id"),
+                      "Review": ("place_id", "user_id")}
+    __refs = {}
+    __layout = layout
+    __journal_limit = journal_limit
+    __pending = {}
+    __cache = {}
+    __journal_size = 0
+    __shard_dir = shard_dir
+    __loaded = set()
+    __all_loaded = False
+    __depth = 0
+    __deferred = False
+    __savepoint = {}
+    __saved_pending = {}
+    __seen = {}
+    __lazy = lazy
+    __raw = {}
+    __serializer = serializers.get(file_format)
+    __compression = file_compression
+    __compression_level = file_compression_level
+    __lock = RWLock()
+    __save_lock = threading.RLock()
+    __file_lock = FileLock()
+    __generations = {}
+    __stats = {"bgsave_in_progress": False, "last_bgsave_time": None,
+               "last_bgsave_duration": None, "last_bgsave_status": None}
+    __bgsave_thread = None
+    __workers = file_workers
+    __chunk = file_chunk
+    __startup_cache = startup_cache
+    __cache_stale = False
+    __exit_hook = False
 
     def all(self, cls=None):
         """returns a dictionary
+        Args:
+            cls: optional class or class name to filter on
+        Return:
+            returns a copy of __objects, or of the objects of cls, taken
+            under the read lock so other threads can keep writing while
+            it is iterated
+        """
+        if cls and not isinstance(cls, str):
+            cls = cls.__name__
+        self.__prepare(cls)
+        with self.__lock.read():
+            if cls:
+                return dict(self.__classes.get(cls, {}))
+            return dict(self.__objects)
+
+    def get(self, cls, id):
+        """returns the object of cls with the given id
+        Args:
+            cls: class or class name
+            id: id of the object
+        Return:
+            returns the object, or None if there is none
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        key = "{}.{}".format(cls, id)
+        with self.__lock.read():
+            obj = self.__objects.get(key)
+        if obj is None and self.__unready(cls):
+            with self.__lock.write():
+                self.__load(cls)
+                obj = self.__objects.get(key)
+                if obj is None and key in self.__raw.get(cls, {}):
+                    obj = self.__decode(key, self.__raw[cls].pop(key))
+                    self.__add(key, obj)
+        return obj
+
+    def count(self, cls=None):
+        """returns the number of objects of cls, or of all objects
+        Args:
+            cls: optional class or class name
+        """
+        if cls and not isinstance(cls, str):
+            cls = cls.__name__
+        self.__prepare(cls, hydrate=False)
+        with self.__lock.read():
+            if cls:
+                return (len(self.__classes.get(cls, {})) +
+                        len(self.__raw.get(cls, {})))
+            return len(self.__objects) + self.__raw_count()
+
+    def all_by(self, cls, name, value):
+        """returns a dictionary of the objects of cls whose attribute
+        name equals value
+        Args:
+            cls: class or class name to filter on
+            name: attribute name, looked up in the reverse indexes
+            value: attribute value to match
         Return:
-            returns a dictionary of __object
+            returns a dictionary of the matching objects
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        self.__prepare(cls)
+        with self.__lock.read():
+            if name in self.__foreign_keys.get(cls, ()):
+                return dict(self.__refs.get((cls, name), {}).get(value, {}))
+            return {key: obj
+                    for key, obj in self.__classes.get(cls, {}).items()
+                    if getattr(obj, name, None) == value}
+
+    def changed(self, obj, name, old=None):
+        """marks a stored object as pending when one of its attributes is
+        set, and moves it between reverse index entries when the
+        attribute is indexed
+        Args:
+            obj: object whose attribute was set
+            name: attribute name
+            old: value before the change
         """
-        new_dict = {}
-        if cls:
-            for key, value in self.__objects.items():
-                if key.split('.')[0] == cls.__name__:
-                    new_dict[key] = value
-            return new_dict
-        return self.__objects
+        cls = type(obj).__name__
+        key = "{}.{}".format(cls, obj.__dict__.get("id"))
+        if self.__objects.get(key) is not obj:
+            return
+        with self.__lock.write():
+            if self.__objects.get(key) is not obj:
+                return
+            if (self.__depth and key not in self.__savepoint and
+                    key not in self.__cache):
+                value = obj.to_dict()
+                if old is None:
+                    value.pop(name, None)
+                elif isinstance(old, datetime):
+                    value[name] = format_time(old)
+                else:
+                    value[name] = old
+                self.__cache[key] = self.__serializer.entry(key, value)
+            self.__mark(key)
+            self.__touch(key, obj)
+            if name not in self.__foreign_keys.get(cls, ()):
+                return
+            index = self.__refs.setdefault((cls, name), {})
+            entry = index.get(old)
+            if entry is not None:
+                entry.pop(key, None)
+                if not entry:
+                    del index[old]
+            index.setdefault(getattr(obj, name), {})[key] = obj
 
     def delete(self, obj=None):
         """
@@ -40,7 +257,10 @@ class FileStorage:
         """
         if obj:
             key = "{}.{}".format(type(obj).__name__, obj.id)
-            del self.__objects[key]
+            with self.__lock.write():
+                self.__mark(key)
+                self.__remove(key)
+                self.__touch(key, None)
 
     def new(self, obj):
         """sets __object to given obj
@@ -49,24 +269,841 @@ class FileStorage:
         """
         if obj:
             key = "{}.{}".format(type(obj).__name__, obj.id)
-            self.__objects[key] = obj
+            with self.__lock.write():
+                self.__mark(key)
+                self.__raw.get(type(obj).__name__, {}).pop(key, None)
+                self.__add(key, obj)
+                self.__touch(key, obj)
+
+    @contextmanager
+    def transaction(self):
+        """groups the saves made inside the block into a single save when
+        the block exits, and undoes the changes of the block if it raises
+        Nested blocks join the outermost one
+        The block holds the save lock, the file lock and the write lock,
+        taken in the order save() takes them, so other threads and
+        processes neither see nor interleave with its changes, and
+        reload(), refresh(), bgsave() and compact() can be called inside it
+        """
+        with self.__save_lock, \
+                self.__file_lock.exclusive(self.__lock_path()), \
+                self.__lock.write():
+            if self.__depth == 0:
+                for key, obj in self.__pending.items():
+                    if obj is not None:
+                        self.__entry(key, obj)
+                FileStorage.__saved_pending = dict(self.__pending)
+                self.__savepoint.clear()
+                FileStorage.__deferred = False
+            FileStorage.__depth += 1
+            try:
+                yield self
+            except BaseException:
+                FileStorage.__depth -= 1
+                if self.__depth == 0:
+                    self.__rollback()
+                raise
+            FileStorage.__depth -= 1
+            flush = self.__depth == 0 and self.__deferred
+            if self.__depth == 0:
+                self.__savepoint.clear()
+        if flush:
+            self.save()
 
     def save(self):
         """serialize the file path to JSON file path
+        Inside a transaction the save is deferred until the block exits
+        In journal layout only the pending changes are appended, and the
+        journal is compacted once it outgrows the store
+        In sharded layout only the files of classes with pending changes
+        are rewritten
+        The entries to write are taken under the write lock, the files are
+        written after it is released so readers are not held up by I/O
+        If another process saved since this one last read the store, its
+        changes are read first and the pending ones applied over them
+        """
+        with self.__lock.write():
+            if self.__depth:
+                FileStorage.__deferred = True
+                return
+            FileStorage.__deferred = False
+        with self.__save_lock, self.__file_lock.exclusive(self.__lock_path()):
+            self.__join_bgsave()
+            if self.__stale():
+                self.__merge()
+            if self.__layout == "sharded":
+                self.__save_shards()
+            elif self.__layout != "journal":
+                self.__dump()
+            else:
+                self.__save_journal()
+
+    def compact(self):
+        """folds the journal back into a fresh JSON file
+        The new JSON file replaces the old one atomically before the
+        journal is removed, so a crash in between only replays records
+        that are already in the JSON file
+        Other layouts have no journal and simply save
+        Inside a transaction it is deferred like save()
+        """
+        if self.__layout == "sharded":
+            return self.save()
+        with self.__lock.write():
+            if self.__depth:
+                FileStorage.__deferred = True
+                return
+        with self.__save_lock, self.__file_lock.exclusive(self.__lock_path()):
+            self.__join_bgsave()
+            if self.__stale():
+                self.__merge()
+            self.__dump()
+            try:
+                os.remove(self.__journal_path())
+            except FileNotFoundError:
+                pass
+            self.__seen[self.__journal_path()] = None
+            FileStorage.__journal_size = 0
+
+    def bgsave(self):
+        """saves like save() from a forked child, while this process keeps
+        serving reads and writes
+        The child writes the JSON file from the copy-on-write memory it
+        got at fork and holds the file lock until it exits. If it fails
+        the changes it was saving are pending again.
+        Journal and sharded layouts already save incrementally and, like
+        systems without fork(), simply save
+        Return:
+            returns False if a background save is already running
         """
-        my_dict = {}
-        for key, value in self.__objects.items():
-            my_dict[key] = value.to_dict()
-        with open(self.__file_path, 'w', encoding="UTF-8") as f:
-            json.dump(my_dict, f)
+        if self.__layout != "file" or not hasattr(os, "fork"):
+            self.save()
+            return True
+        with self.__save_lock:
+            if self.__stats["bgsave_in_progress"]:
+                return False
+            with self.__file_lock.exclusive(self.__lock_path()):
+                self.__join_bgsave()
+                if self.__stale():
+                    self.__merge()
+                with self.__lock.write():
+                    if self.__depth:
+                        FileStorage.__deferred = True
+                        return True
+                    for key, obj in self.__pending.items():
+                        if obj is not None:
+                            self.__entry(key, obj)
+                    started = time.time()
+                    r, w = os.pipe()
+                    pid = os.fork()
+                    if pid == 0:
+                        os.close(r)
+                        self.__bgsave_child(w)
+                    os.close(w)
+                    pending = dict(self.__pending)
+                    self.__pending.clear()
+                    self.__stats["bgsave_in_progress"] = True
+            FileStorage.__bgsave_thread = threading.Thread(
+                target=self.__bgsave_wait, args=(pid, r, started, pending),
+                daemon=True)
+            self.__bgsave_thread.start()
+        return True
+
+    def stats(self):
+        """returns a dictionary of the background save statistics
+            bgsave_in_progress: whether a bgsave() child is running
+            last_bgsave_time: epoch time the last one ended, or None
+            last_bgsave_duration: seconds it spent encoding and writing
+            last_bgsave_status: "ok", "err", or None
+        """
+        with self.__lock.read():
+            return dict(self.__stats)
+
+    def refresh(self):
+        """reloads the store only if one of its files changed since this
+        process last read or wrote it, so one long lived storage can serve
+        many commands
+        A file changed if its stat or its generation did, so a rewrite that
+        happens to reuse the inode, size and mtime is still noticed
+        Only the records that changed are built again and objects with
+        unsaved changes are kept, see __merge()
+        Return:
+            returns True if the store was reloaded
+        """
+        if self.__seen and not self.__stale():
+            return False
+        with self.__file_lock.shared(self.__lock_path()):
+            self.__merge()
+        return True
 
     def reload(self):
         """serialize the file path to JSON file path
+        The JSON file is parsed one entry at a time, so only the objects
+        and not the whole parsed dictionary are held in memory
+        In journal layout the journal is replayed on top of the JSON file
+        In sharded layout the shards already read are read again, the
+        others are left until a class asks for them
+        In lazy mode records are kept as JSON text until asked for
+        With the startup cache the objects of an unchanged JSON file are
+        unpickled from the cache instead, and the cache is written again
+        whenever the file had to be read, and at exit if it was saved
+        """
+        with self.__file_lock.shared(self.__lock_path()), \
+                self.__lock.write():
+            if self.__layout == "sharded":
+                for name in list(self.__loaded):
+                    self.__load_shard(name, overwrite=True)
+                return
+            caching = self.__startup_cache and not self.__lazy
+            if caching and not self.__exit_hook:
+                FileStorage.__exit_hook = True
+                atexit.register(self.__flush_cache)
+            if not caching or not self.__load_cache():
+                keys = []
+                for key, value, entry, obj in self.__records(
+                        self.__file_path):
+                    self.__keep(key, value, entry, obj)
+                    keys.append(key)
+                if caching:
+                    self.__save_cache(self.__cache_state(keys))
+            if self.__layout == "journal":
+                self.__replay()
+
+    def __bgsave_child(self, w):
+        """writes the JSON file in the child of bgsave() and reports the
+        stat, generation and duration of the write through the pipe w
+        Never returns
+        """
+        code = 1
+        try:
+            start = time.perf_counter()
+            self.__write(self.__file_path, self.__entries(
+                self.__objects, self.__raw.values()))
+            os.write(w, marshal.dumps((self.__seen[self.__file_path],
+                                       self.__generations[self.__file_path],
+                                       time.perf_counter() - start)))
+            code = 0
+        finally:
+            os._exit(code)
+
+    def __bgsave_wait(self, pid, r, started, pending):
+        """reaps the child of bgsave() and records how it went
+        Args:
+            pid: process id of the child
+            r: read end of the pipe the child reports through
+            started: epoch time of the fork
+            pending: __pending as it was at the fork
+        """
+        with os.fdopen(r, 'rb') as f:
+            report = f.read()
+        status = os.waitpid(pid, 0)[1]
+        ok = bool(report) and os.waitstatus_to_exitcode(status) == 0
+        with self.__lock.write():
+            if ok:
+                stat, generation, duration = marshal.loads(report)
+                self.__seen[self.__file_path] = stat
+                self.__generations[self.__file_path] = generation
+            else:
+                duration = time.time() - started
+                for key in pending:
+                    if key not in self.__pending:
+                        self.__pending[key] = self.__objects.get(key)
+            self.__stats.update(bgsave_in_progress=False,
+                                last_bgsave_time=time.time(),
+                                last_bgsave_duration=duration,
+                                last_bgsave_status="ok" if ok else "err")
+
+    def __join_bgsave(self):
+        """waits until the last bgsave() child has been reaped"""
+        if self.__bgsave_thread is not None:
+            self.__bgsave_thread.join()
+
+    def __stale(self):
+        """returns whether another process changed a file of the store
+        since this one last read or wrote it, from the stat of each file
+        then from its generation
+        A missing file has nothing to read
+        """
+        for path, stat in list(self.__seen.items()):
+            current = self.__stat(path)
+            if current is None:
+                continue
+            if current != stat:
+                return True
+            if (path != self.__journal_path() and self.__generation(path) !=
+                    self.__generations.get(path, 0)):
+                return True
+        return False
+
+    def __merge(self):
+        """reads the store again, keeping the objects with unsaved
+        changes
+        A record whose entry is the cached one is left alone, the object
+        of a changed record is updated in place and the objects of records
+        no longer on disk are dropped, so only what changed is decoded
+        and the objects still stored keep their identity
+        """
+        with self.__file_lock.shared(self.__lock_path()), \
+                self.__lock.write():
+            FileStorage.__all_loaded = False
+            if self.__layout == "sharded":
+                for name in list(self.__loaded):
+                    found = self.__sync(self.__read(self.__shard_path(name),
+                                                    False))
+                    self.__prune(list(self.__classes.get(name, {})) +
+                                 list(self.__raw.get(name, {})), found)
+                return
+            found = self.__sync(self.__read(self.__file_path, False))
+            if self.__layout == "journal":
+                self.__replay(self.__pending, found)
+            keys = list(self.__objects)
+            for entries in self.__raw.values():
+                keys.extend(entries)
+            self.__prune(keys, found)
+
+    def __sync(self, records):
+        """applies the records read from a file to the objects without
+        unsaved changes, see __merge()
+        Args:
+            records: (key, record, entry) of each record of the file
+        Return:
+            returns the set of the keys of the file
+        """
+        found = set()
+        for key, value, entry in records:
+            found.add(key)
+            if key not in self.__pending:
+                self.__update(key, value, entry)
+        return found
+
+    def __prune(self, keys, found):
+        """drops the keys that are not in found and have no unsaved
+        changes
+        """
+        for key in keys:
+            if key not in found and key not in self.__pending:
+                self.__remove(key, missing_ok=True)
+                self.__raw.get(key.partition('.')[0], {}).pop(key, None)
+                self.__cache.pop(key, None)
+
+    def __unready(self, cls=None, hydrate=True):
+        """returns whether the shard of cls, or any shard, is still to be
+        read, or when hydrate is set whether its records are still to be
+        built
+        """
+        if (self.__layout == "sharded" and not self.__all_loaded and
+                (cls is None or cls not in self.__loaded)):
+            return True
+        if not hydrate:
+            return False
+        if cls is None:
+            return any(self.__raw.values())
+        return bool(self.__raw.get(cls))
+
+    def __prepare(self, cls=None, hydrate=True):
+        """reads the shard of cls, or every shard, and builds its records
+        when hydrate is set, taking the write lock only if there is
+        something to do
+        """
+        if self.__unready(cls, hydrate):
+            with self.__lock.write():
+                self.__load(cls)
+                if hydrate:
+                    self.__hydrate(cls)
+
+    def __save_journal(self):
+        """appends the pending changes to the journal and compacts it once
+        it outgrows the store
+        """
+        with self.__lock.write():
+            lines = []
+            for key, value in self.__pending.items():
+                if value is None:
+                    value = "null"
+                else:
+                    value = self.__serializer.to_json(
+                        key, self.__entry(key, value))
+                lines.append('{"key":' + json.dumps(key) + ',"value":' +
+                             value + "}\n")
+            self.__pending.clear()
+            size = len(self.__objects) + self.__raw_count()
+        if not lines:
+            return
+        with open(self.__journal_path(), 'a', encoding="UTF-8") as f:
+            f.writelines(lines)
+        self.__seen[self.__journal_path()] = self.__stat(
+            self.__journal_path())
+        FileStorage.__journal_size += len(lines)
+        if self.__journal_size > max(self.__journal_limit, size):
+            self.compact()
+
+    def __mark(self, key):
+        """records in __savepoint the entry of key before the open
+        transaction first changes it, None if there is no record of key
+        An object without a cached entry is encoded, so a clean object is
+        never taken for one the transaction created
+        """
+        if not self.__depth or key in self.__savepoint:
+            return
+        obj = self.__objects.get(key)
+        if obj is not None:
+            self.__savepoint[key] = self.__entry(key, obj)
+        else:
+            self.__savepoint[key] = self.__raw.get(
+                key.partition('.')[0], {}).get(key)
+
+    def __touch(self, key, obj):
+        """records key as pending and drops its cached JSON text
+        Args:
+            key: key of the object
+            obj: the object, or None when it was deleted
+        """
+        self.__pending[key] = obj
+        self.__cache.pop(key, None)
+
+    def __entry(self, key, obj):
+        """returns the serialized entry of obj, from the cache unless obj
+        changed since it was last encoded
+        """
+        entry = self.__cache.get(key)
+        if entry is None:
+            entry = self.__serializer.entry(key, obj.to_dict())
+            self.__cache[key] = entry
+        return entry
+
+    def __rollback(self):
+        """puts every object touched in the transaction back to the state
+        recorded in __savepoint, keeping the identity of objects that
+        still exist
+        """
+        for key, entry in self.__savepoint.items():
+            self.__cache.pop(key, None)
+            if entry is None:
+                self.__remove(key, missing_ok=True)
+            else:
+                self.__update(key, None, entry)
+        self.__savepoint.clear()
+        self.__pending.clear()
+        self.__pending.update(self.__saved_pending)
+        FileStorage.__deferred = False
+
+    def __keep(self, key, value, entry, obj=None):
+        """stores a record read from a file, replacing the object of key
+        Args:
+            key: key of the record
+            value: decoded record, None if it was not decoded
+            entry: serialized entry of the record
+            obj: object already built from the record, if any
+        """
+        if self.__lazy:
+            self.__remove(key, missing_ok=True)
+            self.__raw.setdefault(key.partition('.')[0], {})[key] = entry
+        elif obj is not None:
+            self.__add(key, obj)
+        else:
+            self.__add(key, eval(value["__class__"])(**value))
+        self.__cache[key] = entry
+
+    def __update(self, key, value, entry):
+        """stores a record unless entry is the cached entry of key, into
+        the object of key when there is one of the same class
+        In lazy mode a record without an object is kept as its entry
+        Args:
+            key: key of the record
+            value: decoded record, None if it was not decoded
+            entry: serialized entry of the record
+        """
+        obj = self.__objects.get(key)
+        if obj is None and self.__lazy:
+            if self.__cache.get(key) != entry or key not in self.__raw.get(
+                    key.partition('.')[0], {}):
+                self.__keep(key, value, entry)
+            return
+        if obj is not None and self.__cache.get(key) == entry:
+            return
+        if value is None:
+            value = self.__serializer.decode(key, entry)
+        fresh = eval(value["__class__"])(**value)
+        if obj is not None and type(obj) is type(fresh):
+            self.__unlink(key, obj)
+            state = obj.__dict__.get("_sa_instance_state")
+            obj.__dict__.clear()
+            obj.__dict__.update(fresh.__dict__)
+            if state is not None:
+                obj.__dict__["_sa_instance_state"] = state
+            fresh = obj
+        self.__add(key, fresh)
+        self.__cache[key] = entry
+
+    def __decode(self, key, entry):
+        """builds the object of a serialized entry"""
+        value = self.__serializer.decode(key, entry)
+        return eval(value["__class__"])(**value)
+
+    def __hydrate(self, cls=None):
+        """builds the objects of cls, or of every class, still kept as
+        entries
+        """
+        names = [cls] if cls else list(self.__raw)
+        for name in names:
+            for key, entry in self.__raw.pop(name, {}).items():
+                self.__add(key, self.__decode(key, entry))
+
+    def __raw_count(self):
+        """returns the number of records not built yet"""
+        return sum(len(entries) for entries in self.__raw.values())
+
+    def __add(self, key, obj):
+        """stores obj under key in __objects, in its class index and in
+        the reverse indexes of its class
+        """
+        old = self.__objects.get(key)
+        if old is not None and old is not obj:
+            self.__unlink(key, old)
+        cls = type(obj).__name__
+        self.__objects[key] = obj
+        self.__classes.setdefault(cls, {})[key] = obj
+        for name in self.__foreign_keys.get(cls, ()):
+            index = self.__refs.setdefault((cls, name), {})
+            index.setdefault(getattr(obj, name, None), {})[key] = obj
+
+    def __remove(self, key, missing_ok=False):
+        """drops key from __objects and from its class index
+        Raises KeyError for an unknown key unless missing_ok is set
+        """
+        obj = self.__objects.pop(key, None)
+        if obj is None:
+            if missing_ok:
+                return
+            raise KeyError(key)
+        self.__classes[type(obj).__name__].pop(key, None)
+        self.__unlink(key, obj)
+
+    def __unlink(self, key, obj):
+        """drops key from the reverse indexes of the class of obj"""
+        cls = type(obj).__name__
+        for name in self.__foreign_keys.get(cls, ()):
+            index = self.__refs.get((cls, name), {})
+            value = getattr(obj, name, None)
+            entry = index.get(value)
+            if entry is not None:
+                entry.pop(key, None)
+                if not entry:
+                    del index[value]
+
+    def __journal_path(self):
+        """returns the path of the journal next to the JSON file"""
+        return self.__file_path + ".journal"
+
+    def __stat(self, path):
+        """returns the (mtime, size, inode) of path, or None if missing"""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def __cache_path(self):
+        """returns the path of the startup cache next to the JSON file"""
+        return self.__file_path + ".cache"
+
+    def __fingerprint(self, path):
+        """returns the (size, mtime, blake2b digest) of path, or None if
+        it is missing
+        """
+        try:
+            with open(path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                digest = hashlib.blake2b()
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        except FileNotFoundError:
+            return None
+        return (st.st_size, st.st_mtime_ns, digest.hexdigest())
+
+    def __load_cache(self):
+        """stores the objects of the JSON file from the startup cache if
+        it was written for the file as it is now, in the current format
+        The cache is a pickle, so it is trusted like the JSON file is
+        Return:
+            returns whether the cache was used
+        """
+        path = self.__file_path
+        try:
+            with open(self.__cache_path(), 'rb') as f:
+                name, fingerprint, generation = pickle.load(f)
+                st = os.stat(path)
+                if (name != self.__serializer.name or fingerprint[:2] !=
+                        (st.st_size, st.st_mtime_ns) or
+                        fingerprint != self.__fingerprint(path)):
+                    return False
+                objects, entries = pickle.load(f)
+        except (OSError, EOFError, ValueError, TypeError, AttributeError,
+                ImportError, pickle.UnpicklingError):
+            return False
+        for key, obj in objects.items():
+            self.__add(key, obj)
+            self.__cache[key] = entries[key]
+        self.__seen[path] = self.__stat(path)
+        self.__generations[path] = generation
+        return True
+
+    def __cache_state(self, keys):
+        """returns the pickle of the objects of keys and of their entries
+        for the startup cache
+        Taken under the write lock, so that it matches the JSON file
+        """
+        return pickle.dumps(({key: self.__objects[key] for key in keys},
+                             {key: self.__cache[key] for key in keys}), -1)
+
+    def __save_cache(self, state):
+        """writes state, from __cache_state(), to the startup cache with
+        the fingerprint of the JSON file
+        """
+        path = self.__file_path
+        fingerprint = self.__fingerprint(path)
+        if fingerprint is None:
+            return
+        tmp_path = "{}.{}.tmp".format(self.__cache_path(), os.getpid())
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((self.__serializer.name, fingerprint,
+                         self.__generations.get(path, 0)), f, -1)
+            f.write(state)
+        os.replace(tmp_path, self.__cache_path())
+        FileStorage.__cache_stale = False
+
+    def __flush_cache(self):
+        """writes the startup cache at exit if this process saved the JSON
+        file since the cache was last written, and its objects are still
+        exactly what the file holds: nothing is pending, no other process
+        wrote the file since, and no journal record is on top of it
+        """
+        if not self.__cache_stale or self.__lazy:
+            return
+        with self.__file_lock.shared(self.__lock_path()), \
+                self.__lock.write():
+            if (self.__pending or self.__layout == "sharded" or
+                    self.__layout == "journal" and self.__journal_size or
+                    self.__stale()):
+                return
+            self.__save_cache(self.__cache_state(list(self.__objects)))
+
+    def __lock_path(self):
+        """returns the path of the lock file next to the JSON file"""
+        return self.__file_path + ".lock"
+
+    def __generation(self, path):
+        """returns the generation of the file at path, from its first entry
+        Files without a generation and missing files are at 0
+        """
+        try:
+            with open(path, 'rb') as raw, compression.open_read(raw) as f:
+                for key, value, entry in serializers.detect(f).read(f):
+                    if key == "__generation__":
+                        return value
+                    break
+        except FileNotFoundError:
+            pass
+        return 0
+
+    def __shard_path(self, name):
+        """returns the path of the shard of the class called name"""
+        return os.path.join(self.__shard_dir, name + ".json")
+
+    def __read(self, path, decode=None):
+        """yields the (key, record, entry) of the file at path, in the
+        compression and the format its first bytes name
+        Entries of another format than __serializer are encoded again so
+        the cache only holds entries that can be written back as they are
+        Records are None when they were not decoded, which by default
+        happens in lazy mode only
+        The "__generation__" entry is recorded in __generations
+        A missing file yields nothing
+        """
+        self.__seen[path] = self.__stat(path)
+        self.__generations[path] = 0
+        try:
+            with open(path, 'rb') as raw, compression.open_read(raw) as f:
+                reader = serializers.detect(f)
+                if decode is None:
+                    decode = not self.__lazy
+                for key, value, entry in reader.read(f, decode):
+                    if key == "__generation__":
+                        if value is None:
+                            value = reader.decode(key, entry)
+                        self.__generations[path] = value
+                        continue
+                    if reader is not self.__serializer:
+                        if value is None:
+                            value = reader.decode(key, entry)
+                        entry = self.__serializer.entry(key, value)
+                    yield key, value, entry
+        except FileNotFoundError:
+            return
+
+    def __records(self, path):
+        """yields the (key, record, entry, object) of the file at path
+        When there are several __workers, records are not decoded here
+        and the objects are built in the workers, otherwise objects are
+        None and records are decoded as by __read()
+        """
+        if self.__lazy or self.__workers < 2 or not workers.available():
+            for key, value, entry in self.__read(path):
+                yield key, value, entry, None
+            return
+        records = self.__read(path, False)
+        chunks = iter(lambda: list(islice(records, self.__chunk)), [])
+        for chunk, objs in workers.parallel(workers.build, chunks,
+                                            self.__workers,
+                                            self.__serializer,
+                                            classes=class_dict):
+            for (key, value, entry), obj in zip(chunk, objs):
+                yield key, value, entry, obj
+
+    def __write(self, path, entries):
+        """writes entries to a temporary file and moves it over path,
+        after an entry with the next generation of the file
+        Args:
+            path: destination file
+            entries: list of the entries to write
+        """
+        generation = self.__generation(path) + 1
+        entries.insert(0, self.__serializer.entry("__generation__",
+                                                  generation))
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as out, compression.open_write(
+                out, self.__compression, self.__compression_level) as f:
+            self.__serializer.write(f, entries)
+        os.replace(tmp_path, path)
+        self.__generations[path] = generation
+        self.__seen[path] = self.__stat(path)
+
+    def __entries(self, objs, raw):
+        """returns the list of the entries of objs then those of raw
+        Args:
+            objs: dictionary of the objects to write
+            raw: dictionaries of the entries of records not built yet
+        Objects without a cached entry are encoded in __workers processes
+        when there are several and more than __chunk objects to encode
+        """
+        if self.__workers > 1 and workers.available():
+            keys = [key for key in objs if key not in self.__cache]
+            if len(keys) > self.__chunk:
+                chunks = (keys[i:i + self.__chunk]
+                          for i in range(0, len(keys), self.__chunk))
+                for chunk, done in workers.parallel(
+                        workers.encode, chunks, self.__workers,
+                        self.__serializer, objs):
+                    self.__cache.update(zip(chunk, done))
+        entries = [self.__entry(key, value) for key, value in objs.items()]
+        for records in raw:
+            entries.extend(records.values())
+        return entries
+
+    def __dump(self):
+        """writes every object to the JSON file
+        The startup cache is left to __flush_cache() at exit, so a save
+        only encodes the objects that changed
+        """
+        with self.__lock.write():
+            entries = self.__entries(self.__objects, self.__raw.values())
+            self.__pending.clear()
+            if self.__startup_cache:
+                FileStorage.__cache_stale = True
+        self.__write(self.__file_path, entries)
+
+    def __load(self, cls=None):
+        """reads the shard of cls, or every shard, if not read yet
+        Does nothing outside of sharded layout
+        """
+        if self.__layout != "sharded" or self.__all_loaded:
+            return
+        if cls is not None:
+            if cls not in self.__loaded:
+                self.__load_shard(cls)
+            return
+        try:
+            files = os.listdir(self.__shard_dir)
+        except FileNotFoundError:
+            files = []
+        for name in files:
+            if name.endswith(".json") and name[:-5] not in self.__loaded:
+                self.__load_shard(name[:-5])
+        FileStorage.__all_loaded = True
+
+    def __load_shard(self, name, overwrite=False):
+        """reads the shard of the class called name
+        Args:
+            name: class name
+            overwrite: replace objects already in memory, otherwise they
+                and pending deletions are kept as newer than the shard
+        """
+        self.__loaded.add(name)
+        records = self.__records(self.__shard_path(name))
+        for key, value, entry, obj in records:
+            if not overwrite and (key in self.__objects or
+                                  key in self.__pending):
+                continue
+            self.__keep(key, value, entry, obj)
+
+    def __save_shards(self):
+        """rewrites the shards of the classes with pending changes"""
+        with self.__lock.write():
+            shards = []
+            for name in {key.partition('.')[0] for key in self.__pending}:
+                self.__load(name)
+                shards.append((name, self.__entries(
+                    self.__classes.get(name, {}),
+                    [self.__raw.get(name, {})])))
+            self.__pending.clear()
+        if shards:
+            os.makedirs(self.__shard_dir, exist_ok=True)
+        for name, entries in shards:
+            self.__write(self.__shard_path(name), entries)
+
+    def __replay(self, skip=(), found=None):
+        """applies the journal records in order, records that are the
+        cached entry of their key are left alone
+        Args:
+            skip: keys left as they are in memory
+            found: set of keys on disk, updated with the journal records
+        A torn last line left by a crash is cut off so that later appends
+        start on a clean line
         """
+        size = 0
+        path = self.__journal_path()
+        self.__seen[path] = self.__stat(path)
         try:
-            with open(self.__file_path, 'r', encoding="UTF-8") as f:
-                for key, value in (json.load(f)).items():
-                    value = eval(value["__class__"])(**value)
-                    self.__objects[key] = value
+            with open(path, 'r+b') as f:
+                offset = 0
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("torn journal record")
+                        record = json.loads(line)
+                    except ValueError:
+                        f.truncate(offset)
+                        self.__seen[path] = None
+                        break
+                    key, value = record["key"], record["value"]
+                    offset += len(line)
+                    size += 1
+                    if found is not None:
+                        if value is None:
+                            found.discard(key)
+                        else:
+                            found.add(key)
+                    if key in skip:
+                        continue
+                    if value is None:
+                        self.__cache.pop(key, None)
+                        self.__raw.get(key.partition('.')[0], {}).pop(key,
+                                                                      None)
+                        self.__remove(key, missing_ok=True)
+                    else:
+                        self.__update(key, value,
+                                      self.__serializer.entry(key, value))
         except FileNotFoundError:
             pass
+        if path in self.__seen and self.__seen[path] is None:
+            self.__seen[path] = self.__stat(path)
+        FileStorage.__journal_size = size
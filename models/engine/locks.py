@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+"""Locks shared by the threads of one process and by processes"""
+import threading
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class RWLock:
+    """This class lets many threads read at once while writers are
+    exclusive
+    Both sides are reentrant and a writer may also read, but a reader
+    cannot become a writer. Waiting writers hold off new readers so
+    they are not starved.
+    Attributes:
+        __cond: condition guarding the fields below
+        __readers: thread id -> number of read() blocks it is in
+        __writer: thread id of the writer, or None
+        __depth: number of write() blocks the writer is in
+        __waiting: number of threads waiting to write
+    """
+
+    def __init__(self):
+        """Method to set up the lock"""
+        self.__cond = threading.Condition(threading.Lock())
+        self.__readers = {}
+        self.__writer = None
+        self.__depth = 0
+        self.__waiting = 0
+
+    @contextmanager
+    def read(self):
+        """holds the lock shared for the block"""
+        me = threading.get_ident()
+        with self.__cond:
+            if self.__writer != me and me not in self.__readers:
+                while self.__writer is not None or self.__waiting:
+                    self.__cond.wait()
+            self.__readers[me] = self.__readers.get(me, 0) + 1
+        try:
+            yield
+        finally:
+            with self.__cond:
+                if self.__readers[me] > 1:
+                    self.__readers[me] -= 1
+                else:
+                    del self.__readers[me]
+                    if not self.__readers:
+                        self.__cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        """holds the lock exclusively for the block
+        Raises RuntimeError if the thread only holds the lock to read
+        """
+        me = threading.get_ident()
+        with self.__cond:
+            if self.__writer != me:
+                if me in self.__readers:
+                    raise RuntimeError("a reader cannot take the write lock")
+                self.__waiting += 1
+                try:
+                    while self.__writer is not None or self.__readers:
+                        self.__cond.wait()
+                finally:
+                    self.__waiting -= 1
+                self.__writer = me
+            self.__depth += 1
+        try:
+            yield
+        finally:
+            with self.__cond:
+                self.__depth -= 1
+                if self.__depth == 0:
+                    self.__writer = None
+                    self.__cond.notify_all()
+
+
+class FileLock:
+    """This class holds an advisory flock() on a lock file, shared or
+    exclusive, for the threads of this process and against other
+    processes on the host
+    Blocks are reentrant, the lock file is opened by the outermost one
+    and closed, which releases the flock(), by the last one out. Only
+    writers create the lock file: a shared block on a missing one has no
+    writer to wait for and only orders the threads of this process, so
+    reading never needs a writable directory. Without fcntl only the
+    threads of this process are ordered.
+    Attributes:
+        __rw: readers-writer lock ordering the threads of this process
+        __mutex: guards the fields below
+        __file: open lock file while the lock is held, None when it is
+            not or when a shared block found no lock file
+        __holders: number of blocks holding the lock
+    """
+
+    def __init__(self):
+        """Method to set up the lock"""
+        self.__rw = RWLock()
+        self.__mutex = threading.Lock()
+        self.__file = None
+        self.__holders = 0
+
+    @contextmanager
+    def shared(self, path):
+        """holds the lock shared for the block
+        Args:
+            path: lock file, left alone if missing
+        """
+        with self.__rw.read():
+            self.__acquire(path, False)
+            try:
+                yield
+            finally:
+                self.__release()
+
+    @contextmanager
+    def exclusive(self, path):
+        """holds the lock exclusively for the block
+        Args:
+            path: lock file, created if missing
+        """
+        with self.__rw.write():
+            self.__acquire(path, True)
+            try:
+                yield
+            finally:
+                self.__release()
+
+    def __acquire(self, path, exclusive):
+        """opens and locks path unless this process already holds it"""
+        with self.__mutex:
+            if self.__holders == 0:
+                try:
+                    self.__file = open(path, 'a' if exclusive else 'r')
+                except FileNotFoundError:
+                    if exclusive:
+                        raise
+                if self.__file is not None and fcntl is not None:
+                    fcntl.flock(self.__file.fileno(),
+                                fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self.__holders += 1
+
+    def __release(self):
+        """closes the lock file when the last block exits"""
+        with self.__mutex:
+            self.__holders -= 1
+            if self.__holders == 0 and self.__file is not None:
+                self.__file.close()
+                self.__file = None
@@ -0,0 +1,153 @@
+#!/usr/bin/python3
+"""Record formats of the file storage
+
+A serializer turns each stored object into an entry, writes the entries
+of a store to a file and reads them back. Entries are what FileStorage
+caches, so a save only encodes the objects that changed.
+    json: one JSON object, '"key":record' per entry, no marker
+    marshal, msgpack: a magic marker then length-prefixed entries,
+        (key length, record length) followed by the key and the record
+Files are read in whichever format their first bytes name, so a store
+can switch formats by loading and saving it once.
+"""
+import io
+import json
+import marshal
+import struct
+from models.engine.streaming import iter_items, key_re
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+frame = struct.Struct("<II")
+magics = {b"HBNBMSH1": "marshal", b"HBNBMPK1": "msgpack"}
+encoder = json.JSONEncoder(separators=(",", ":"), check_circular=False)
+
+
+class JSONSerializer:
+    """Compact JSON object, readable and the default"""
+    name = "json"
+    magic = b""
+
+    def entry(self, key, value):
+        """returns the '"key":record' text of value"""
+        return json.dumps(key) + ":" + encoder.encode(value)
+
+    def decode(self, key, entry):
+        """returns the record of an entry"""
+        return json.loads(entry[key_re.match(entry).end():])
+
+    def to_json(self, key, entry):
+        """returns the JSON text of the record of an entry"""
+        return entry[key_re.match(entry).end():]
+
+    def write(self, f, entries):
+        """writes entries as one JSON object to the binary file f"""
+        out = io.TextIOWrapper(f, encoding="UTF-8", newline="")
+        try:
+            out.write("{")
+            sep = ""
+            for entry in entries:
+                out.write(sep)
+                out.write(entry)
+                sep = ","
+            out.write("}")
+            out.flush()
+        finally:
+            out.detach()
+
+    def read(self, f, decode=True):
+        """yields the (key, record, entry) of the binary file f
+        When decode is false, entries are only scanned for where they end
+        and records are None
+        """
+        text = io.TextIOWrapper(f, encoding="UTF-8", newline="")
+        try:
+            yield from iter_items(text, raw=True, decode=decode)
+        finally:
+            text.detach()
+
+
+class FramedSerializer:
+    """Length-prefixed binary entries, faster to write and to read"""
+
+    def __init__(self, name, dumps, loads):
+        """Method to set up the serializer
+        Args:
+            name: format name, also found through its magic marker
+            dumps: function encoding a record to bytes
+            loads: function decoding bytes to a record
+        """
+        self.name = name
+        self.magic = next(m for m, n in magics.items() if n == name)
+        self.__dumps = dumps
+        self.__loads = loads
+
+    def entry(self, key, value):
+        """returns the framed bytes of key and value"""
+        key = key.encode()
+        value = self.__dumps(value)
+        return frame.pack(len(key), len(value)) + key + value
+
+    def decode(self, key, entry):
+        """returns the record of an entry"""
+        key_length, length = frame.unpack_from(entry)
+        return self.__loads(entry[frame.size + key_length:])
+
+    def to_json(self, key, entry):
+        """returns the JSON text of the record of an entry"""
+        return encoder.encode(self.decode(key, entry))
+
+    def write(self, f, entries):
+        """writes the marker then entries to the binary file f"""
+        f.write(self.magic)
+        f.writelines(entries)
+
+    def read(self, f, decode=True):
+        """yields the (key, record, entry) of the binary file f
+        Args:
+            f: binary file positioned at the marker
+            decode: decode records, otherwise None is yielded for them
+        """
+        if f.read(len(self.magic)) != self.magic:
+            raise ValueError("not a {} file".format(self.name))
+        while True:
+            head = f.read(frame.size)
+            if not head:
+                return
+            if len(head) < frame.size:
+                raise ValueError("truncated {} entry".format(self.name))
+            key_length, length = frame.unpack(head)
+            body = f.read(key_length + length)
+            if len(body) < key_length + length:
+                raise ValueError("truncated {} entry".format(self.name))
+            value = self.__loads(body[key_length:]) if decode else None
+            yield body[:key_length].decode(), value, head + body
+
+
+serializers = {"json": JSONSerializer(),
+               "marshal": FramedSerializer("marshal", marshal.dumps,
+                                           marshal.loads)}
+if msgpack is not None:
+    serializers["msgpack"] = FramedSerializer("msgpack", msgpack.packb,
+                                              msgpack.unpackb)
+
+
+def get(name):
+    """returns the serializer called name
+    Raises ValueError for an unknown or unavailable format
+    """
+    if name == "msgpack" and msgpack is None:
+        raise ValueError("the msgpack format needs the msgpack package")
+    if name not in serializers:
+        raise ValueError("unknown file format {}".format(name))
+    return serializers[name]
+
+
+def detect(f):
+    """returns the serializer of the binary file f from its first bytes,
+    without moving its position
+    """
+    head = f.peek(8)[:8]
+    return get(magics.get(head, "json"))
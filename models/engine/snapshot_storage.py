@@ -0,0 +1,252 @@
+#!/usr/bin/python3
+"""Read-only storage engine over a memory-mapped binary snapshot
+
+A snapshot is laid out as
+    header: magic, number of records, offset of the index
+    records: the JSON of each object, back to back
+    index: one (key offset, key length, record offset, record length)
+        entry per record, sorted by key, followed by the keys
+Workers map the file read-only, so every process shares the page cache
+copy, and look keys up by binary search in the index. A record is only
+decoded when its object is asked for.
+"""
+import json
+import mmap
+import os
+import struct
+from models.base_model import BaseModel, format_time
+from models.user import User
+from models.state import State
+from models.city import City
+from models.amenity import Amenity
+from models.place import Place
+from models.review import Review
+
+'''Accessing and storing environment variables'''
+path = os.getenv("HBNB_SNAPSHOT_PATH", "file.snap")
+class_dict = {"BaseModel": BaseModel, "User": User, "State": State,
+              "City": City, "Place": Place, "Amenity": Amenity,
+              "Review": Review}
+magic = b"HBNBSNP1"
+header = struct.Struct("<8sQQ")
+entry = struct.Struct("<QIQI")
+
+
+def record(obj):
+    """returns the record of obj as file storage writes it, whatever the
+    storage type: with its class name and formatted timestamps, and
+    without the related objects a database session may have loaded
+    Args:
+        obj: object to export
+    """
+    value = {}
+    for name, attr in obj.to_dict().items():
+        if isinstance(attr, BaseModel) or isinstance(attr, list) and any(
+                isinstance(item, BaseModel) for item in attr):
+            continue
+        value[name] = attr
+    value["__class__"] = type(obj).__name__
+    value["created_at"] = format_time(obj.created_at)
+    value["updated_at"] = format_time(obj.updated_at)
+    return value
+
+
+def export(objects, path=path):
+    """compiles objects into a snapshot file at path
+    The file is written next to path and moved over it, so workers that
+    have the old snapshot mapped keep reading it, and removed if the
+    export fails
+    Args:
+        objects: dictionary of key -> object, such as storage.all()
+        path: destination snapshot file
+    """
+    items = sorted((key.encode(), obj) for key, obj in objects.items())
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(header.pack(magic, 0, 0))
+            records = []
+            for key, obj in items:
+                data = json.dumps(record(obj)).encode()
+                records.append((f.tell(), len(data)))
+                f.write(data)
+            index_offset = f.tell()
+            key_offset = index_offset + entry.size * len(items)
+            for (key, obj), (offset, length) in zip(items, records):
+                f.write(entry.pack(key_offset, len(key), offset, length))
+                key_offset += len(key)
+            for key, obj in items:
+                f.write(key)
+            f.seek(0)
+            f.write(header.pack(magic, len(items), index_offset))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class SnapshotStorage:
+    """This class serves objects from a snapshot written by export()
+    Attributes:
+        __path: path of the snapshot file
+        __map: read-only memory map of the file
+        __count: number of records
+        __index: offset of the index in the file
+        __objects: objects decoded so far by this process
+        __stat: (mtime, size, inode) of the mapped file
+    """
+
+    def __init__(self, path=path):
+        """Method to set up the storage
+        Args:
+            path: path of the snapshot file
+        """
+        self.__path = path
+        self.__map = None
+        self.__count = 0
+        self.__index = 0
+        self.__objects = {}
+        self.__stat = None
+
+    def all(self, cls=None):
+        """returns a dictionary of the objects of cls, or of all objects
+        Args:
+            cls: optional class or class name to filter on
+        """
+        if cls:
+            lo, hi = self.__range(cls)
+        else:
+            lo, hi = 0, self.__count
+        new_dict = {}
+        for i in range(lo, hi):
+            key = self.__key(i).decode()
+            new_dict[key] = self.__get(i, key)
+        return new_dict
+
+    def all_by(self, cls, name, value):
+        """returns a dictionary of the objects of cls whose attribute
+        name equals value
+        """
+        return {key: obj for key, obj in self.all(cls).items()
+                if getattr(obj, name, None) == value}
+
+    def get(self, cls, id):
+        """returns the object of cls with the given id, or None"""
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        key = "{}.{}".format(cls, id)
+        i = self.__find(key.encode())
+        if i is None:
+            return None
+        return self.__get(i, key)
+
+    def count(self, cls=None):
+        """returns the number of objects of cls, or of all objects
+        Nothing is decoded
+        """
+        if cls:
+            lo, hi = self.__range(cls)
+            return hi - lo
+        return self.__count
+
+    def changed(self, obj, name, old=None):
+        """Nothing to track, the snapshot is never written"""
+        pass
+
+    def new(self, obj):
+        """refuses to add obj, the snapshot is read-only"""
+        raise PermissionError("snapshot storage is read-only")
+
+    def save(self):
+        """refuses to save, the snapshot is read-only"""
+        raise PermissionError("snapshot storage is read-only")
+
+    def delete(self, obj=None):
+        """refuses to delete obj, the snapshot is read-only"""
+        raise PermissionError("snapshot storage is read-only")
+
+    def refresh(self):
+        """maps the snapshot again if export() replaced it
+        Return:
+            returns True if the snapshot was mapped again
+        """
+        try:
+            st = os.stat(self.__path)
+        except FileNotFoundError:
+            return False
+        if (st.st_mtime_ns, st.st_size, st.st_ino) == self.__stat:
+            return False
+        self.reload()
+        return True
+
+    def reload(self):
+        """maps the snapshot file and reads its header
+        A missing file is served as an empty snapshot
+        """
+        self.close()
+        self.__objects.clear()
+        try:
+            with open(self.__path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                self.__map = mmap.mmap(f.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return
+        self.__stat = (st.st_mtime_ns, st.st_size, st.st_ino)
+        tag, self.__count, self.__index = header.unpack_from(self.__map)
+        if tag != magic:
+            self.close()
+            raise ValueError("{} is not a snapshot".format(self.__path))
+
+    def close(self):
+        """unmaps the snapshot file"""
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+        self.__count = 0
+        self.__stat = None
+
+    def __key(self, i):
+        """returns the key of the i-th index entry as bytes"""
+        key_offset, key_length, offset, length = entry.unpack_from(
+            self.__map, self.__index + i * entry.size)
+        return self.__map[key_offset:key_offset + key_length]
+
+    def __get(self, i, key):
+        """returns the object of the i-th entry, decoding it on first use"""
+        obj = self.__objects.get(key)
+        if obj is None:
+            key_offset, key_length, offset, length = entry.unpack_from(
+                self.__map, self.__index + i * entry.size)
+            value = json.loads(self.__map[offset:offset + length])
+            obj = class_dict[value["__class__"]](**value)
+            self.__objects[key] = obj
+        return obj
+
+    def __bisect(self, key):
+        """returns the position of the first entry whose key is >= key"""
+        lo, hi = 0, self.__count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.__key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def __find(self, key):
+        """returns the position of the entry of key, or None"""
+        i = self.__bisect(key)
+        if i < self.__count and self.__key(i) == key:
+            return i
+        return None
+
+    def __range(self, cls):
+        """returns the [lo, hi) positions of the entries of cls
+        Keys of a class share the "<Class>." prefix and '/' sorts right
+        after '.'
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        return (self.__bisect((cls + ".").encode()),
+                self.__bisect((cls + "/").encode()))
@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+"""Embedded SQLite database storage engine"""
+import os
+from sqlalchemy import create_engine, event
+from models.engine.db_storage import DBStorage
+
+'''Accessing and storing environment variables'''
+path = os.getenv("HBNB_SQLITE_PATH", "hbnb.db")
+wal = os.getenv("HBNB_SQLITE_WAL", "1") != "0"
+
+
+class SQLiteStorage(DBStorage):
+    """Database storage backed by a SQLite file, for single node
+    deployments and tests that should not need a MySQL server
+    Attributes:
+        path: path to the database file, or ":memory:"
+        wal: whether the file uses write-ahead logging
+    """
+
+    def __init__(self, path=path, wal=wal):
+        """Method to create the new engine
+        Args:
+            path: path to the database file
+            wal: use write-ahead logging so readers do not block writers
+        """
+        self.path = path
+        self.wal = wal
+        super().__init__()
+
+    def make_engine(self):
+        """Returns the SQLAlchemy engine of the SQLite file, with the
+        journal mode and foreign key checks set on every connection
+        """
+        engine = create_engine("sqlite:///{}".format(self.path))
+
+        @event.listens_for(engine, "connect")
+        def set_pragmas(dbapi_connection, connection_record):
+            """Sets the pragmas of a new SQLite connection"""
+            cursor = dbapi_connection.cursor()
+            if self.wal:
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.close()
+
+        return engine
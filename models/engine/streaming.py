@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+"""Incremental reader for the top-level JSON object of a storage file"""
+import json
+import re
+
+decoder = json.JSONDecoder()
+head = re.compile(r'[ \t\n\r]*\{[ \t\n\r]*(\})?')
+key_re = re.compile(r'[ \t\n\r]*"((?:[^"\\]|\\.)*)"[ \t\n\r]*:[ \t\n\r]*')
+sep_re = re.compile(r'[ \t\n\r]*([,}])')
+
+
+def value_end(buf, pos):
+    """returns where the JSON value starting at pos in buf ends, without
+    building it
+    Flat objects with no escapes, the records of a storage file, are
+    delimited with string searches only; any other value is left to the
+    JSON parser
+    Args:
+        buf: text holding the value
+        pos: index of its first character
+    """
+    if buf.startswith("{", pos):
+        end = buf.find("}", pos)
+        while end != -1:
+            if (buf.find("\\", pos, end) != -1 or
+                    buf.count("{", pos, end) != 1):
+                break
+            if buf.count('"', pos, end) % 2 == 0:
+                return end + 1
+            end = buf.find("}", end + 1)
+    return decoder.raw_decode(buf, pos)[1]
+
+
+def iter_items(f, chunk_size=1 << 16, raw=False, decode=True):
+    """yields the (key, value) pairs of the JSON object in f one at a time
+    Only the text of the entry being decoded is buffered, so the whole
+    object is never held in memory at once
+    Args:
+        f: text file positioned at the start of a JSON object
+        chunk_size: number of characters read at a time
+        raw: also yield the source text of each '"key": value' entry
+        decode: when false, values are only scanned for where they end
+            and yielded as None
+    """
+    buf = f.read(chunk_size)
+    eof = not buf
+    pos = 0
+    while True:
+        m = head.match(buf)
+        if m is not None and (m.end() < len(buf) or eof):
+            break
+        if eof:
+            raise json.JSONDecodeError("Expecting '{'", buf, 0)
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buf += chunk
+    if m.group(1):
+        return
+    pos = m.end()
+    while True:
+        try:
+            k = key_re.match(buf, pos)
+            if k is None:
+                raise json.JSONDecodeError("Expecting key", buf, pos)
+            if decode:
+                value, end = decoder.raw_decode(buf, k.end())
+            else:
+                value, end = None, value_end(buf, k.end())
+            s = sep_re.match(buf, end)
+            if s is None:
+                raise json.JSONDecodeError("Expecting ',' or '}'", buf, end)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        key = k.group(1)
+        if "\\" in key:
+            key = json.loads('"' + key + '"')
+        if raw:
+            yield key, value, buf[k.start(1) - 1:end]
+        else:
+            yield key, value
+        if s.group(1) == "}":
+            return
+        pos = s.end()
@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""Worker processes sharing the encoding and the loading of large stores
+
+Workers are forked, so they inherit the serializer, the objects to
+encode and the classes to build instead of receiving them pickled, and
+only chunks of keys or entries and their results cross between
+processes. Loading workers return built objects rather than records:
+unpickling an object costs the main process less than building it.
+"""
+import gc
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+'''State of a worker process, set by start()'''
+work = {}
+
+
+def available():
+    """returns whether worker processes can be forked here"""
+    return hasattr(os, "fork")
+
+
+def start(serializer, objs=None, classes=None):
+    """sets up a worker process
+    Args:
+        serializer: format of the entries
+        objs: dictionary of the objects to encode
+        classes: dictionary of the classes to build, by name
+    """
+    work["serializer"] = serializer
+    work["objs"] = objs
+    work["classes"] = classes
+
+
+def encode(keys):
+    """returns the entries of the objects of keys"""
+    serializer, objs = work["serializer"], work["objs"]
+    return [serializer.entry(key, objs[key].to_dict()) for key in keys]
+
+
+def build(records):
+    """returns the objects of a list of (key, record, entry)"""
+    serializer, classes = work["serializer"], work["classes"]
+    objs = []
+    for key, value, entry in records:
+        value = serializer.decode(key, entry)
+        objs.append(classes[value["__class__"]](**value))
+    return objs
+
+
+def parallel(function, chunks, workers, serializer, objs=None,
+             classes=None):
+    """yields (chunk, function(chunk)) for each chunk, in order, computed
+    by forked worker processes
+    At most two chunks per worker are in flight, so a long stream of
+    chunks is never held in memory at once. The objects of this process
+    are frozen out of the garbage collector while the workers run, so
+    collections in the workers do not touch, and copy, every page they
+    inherited
+    Args:
+        function: encode or build
+        chunks: iterable of the chunks to work on
+        workers: number of worker processes
+        serializer, objs, classes: passed to start() in each worker
+    """
+    context = multiprocessing.get_context("fork")
+    gc.freeze()
+    try:
+        with ProcessPoolExecutor(workers, mp_context=context,
+                                 initializer=start,
+                                 initargs=(serializer, objs,
+                                           classes)) as pool:
+            window = deque()
+            for chunk in chunks:
+                window.append((chunk, pool.submit(function, chunk)))
+                if len(window) > 2 * workers:
+                    chunk, future = window.popleft()
+                    yield chunk, future.result()
+            while window:
+                chunk, future = window.popleft()
+                yield chunk, future.result()
+    finally:
+        gc.unfreeze()
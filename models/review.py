@@ -1,7 +1,8 @@
 #!/usr/bin/python3
 """This is the review class"""
-from models.base_model import BaseModel, Base
-from sqlalchemy import Column, String, ForeignKey
+from models.base_model import BaseModel, Base, storage_type
+if storage_type == "db":
+    from sqlalchemy import Column, String, ForeignKey
 
 
 class Review(BaseModel, Base):
@@ -11,7 +12,13 @@ class Review(BaseModel, Base):
         user_id: user id
         text: review description
     """
-    __tablename__ = "reviews"
-    place_id = Column(String(60), ForeignKey('places.id'), nullable=False)
-    user_id = Column(String(60), ForeignKey('users.id'), nullable=False)
-    text = Column(String(1024), nullable=False)
+    if storage_type == "db":
+        __tablename__ = "reviews"
+        place_id = Column(String(60), ForeignKey('places.id'),
+                          nullable=False)
+        user_id = Column(String(60), ForeignKey('users.id'), nullable=False)
+        text = Column(String(1024), nullable=False)
+    else:
+        place_id = None
+        user_id = None
+        text = None
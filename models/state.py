@@ -1,9 +1,10 @@
 #!/usr/bin/python3
 """This is the state class"""
-from models.base_model import BaseModel, Base
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
-import os
+import models
+from models.base_model import BaseModel, Base, storage_type
+if storage_type == "db":
+    from sqlalchemy import Column, String
+    from sqlalchemy.orm import relationship
 
 
 class State(BaseModel, Base):
@@ -11,21 +12,19 @@ class State(BaseModel, Base):
     Attributes:
         name: input name
     """
-    __tablename__ = 'states'
-    name = Column(String(128), nullable=False)
-
-    @property
-    def cities(self):
-        """
-        Getter attribute for filestorage that returns a list of City instances
-        where state_id == State.id
-        """
-        cities = []
-        for each in storage.all('City').values():
-            if each.state_id == self.id:
-                cities.append(each)
-            return cities
-
-    if os.getenv('HBNB_TYPE_STORAGE') == 'db':
+    if storage_type == "db":
+        __tablename__ = 'states'
+        name = Column(String(128), nullable=False)
         cities = relationship("City", cascade="all, delete-orphan",
                               backref="state")
+    else:
+        name = None
+
+        @property
+        def cities(self):
+            """
+            Getter attribute for filestorage that returns a list of City
+            instances where state_id == State.id
+            """
+            return list(models.storage.all_by('City', 'state_id',
+                                              self.id).values())
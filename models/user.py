@@ -1,8 +1,9 @@
 #!/usr/bin/python3
 """This is the user class"""
-from models.base_model import BaseModel, Base
-from sqlalchemy import Column, String
-from sqlalchemy.orm import relationship
+from models.base_model import BaseModel, Base, storage_type
+if storage_type == "db":
+    from sqlalchemy import Column, String
+    from sqlalchemy.orm import relationship
 
 
 class User(BaseModel, Base):
@@ -13,11 +14,18 @@ class User(BaseModel, Base):
         first_name: first name
         last_name: last name
     """
-    __tablename__ = 'users'
-    email = Column(String(128), nullable=False)
-    password = Column(String(128), nullable=False)
-    first_name = Column(String(128))
-    last_name = Column(String(128))
+    if storage_type == "db":
+        __tablename__ = 'users'
+        email = Column(String(128), nullable=False)
+        password = Column(String(128), nullable=False)
+        first_name = Column(String(128))
+        last_name = Column(String(128))
 
-    places = relationship('Place', backref='user', cascade='all, delete')
-    reviews = relationship('Review', backref='user', cascade='all, delete')
+        places = relationship('Place', backref='user', cascade='all, delete')
+        reviews = relationship('Review', backref='user',
+                               cascade='all, delete')
+    else:
+        email = None
+        password = None
+        first_name = None
+        last_name = None
@@ -2,7 +2,12 @@
 """test for BaseModel"""
 import unittest
 import os
+import shutil
+import tempfile
+from datetime import datetime
+from unittest.mock import patch
 from models.base_model import BaseModel
+from models.engine.file_storage import FileStorage
 import pep8
 
 
@@ -24,16 +29,15 @@ class TestBaseModel(unittest.TestCase):
         del cls.base
 
     def setUp(self):
-        """Setup method"""
+        """Setup method, the storage files go to a temporary directory"""
         if os.getenv('HBNB_TYPE_STORAGE') == 'db':
             self.skipTest("Using db storage")
-
-    def tearDown(self):
-        """teardown"""
-        try:
-            os.remove("file.json")
-        except Exception:
-            pass
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        path = patch.object(FileStorage, "_FileStorage__file_path",
+                            os.path.join(self.tmp, "file.json"))
+        path.start()
+        self.addCleanup(path.stop)
 
     def test_pep8_BaseModel(self):
         """Testing for pep8"""
@@ -71,6 +75,19 @@ class TestBaseModel(unittest.TestCase):
         self.assertIsInstance(base_dict['created_at'], str)
         self.assertIsInstance(base_dict['updated_at'], str)
 
+    def test_timestamps_BaseModel(self):
+        """test that both timestamp forms load back to the same datetime"""
+        created = datetime(2017, 9, 28, 21, 3, 54, 52298)
+        legacy = BaseModel(id="legacy",
+                           created_at="2017-09-28T21:03:54.052298",
+                           updated_at="2017-09-28T21:03:54")
+        self.assertEqual(legacy.created_at, created)
+        self.assertEqual(legacy.updated_at, created.replace(microsecond=0))
+        with patch("models.base_model.time_format", "epoch"):
+            stored = legacy.to_dict()
+        self.assertIsInstance(stored['created_at'], int)
+        self.assertEqual(BaseModel(**stored).created_at, created)
+
 
 if __name__ == "__main__":
     unittest.main()
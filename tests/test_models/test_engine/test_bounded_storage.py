@@ -0,0 +1,143 @@
+#!/usr/bin/python3
+"""test for bounded storage"""
+import unittest
+import pep8
+import os
+import shutil
+import tempfile
+from models.state import State
+from models.city import City
+from models.engine.bounded_storage import BoundedStorage
+
+
+class TestBoundedStorage(unittest.TestCase):
+    '''this will test the BoundedStorage'''
+
+    def setUp(self):
+        """Setup method"""
+        if os.getenv('HBNB_TYPE_STORAGE') == 'db':
+            self.skipTest("Using db storage")
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "file.rec")
+        self.storage = BoundedStorage(self.path, capacity=2)
+        self.storage.reload()
+
+    def tearDown(self):
+        """teardown"""
+        self.storage.close()
+        shutil.rmtree(self.tmp)
+
+    def test_pep8_BoundedStorage(self):
+        """Tests pep8 style"""
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(['models/engine/bounded_storage.py'])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_eviction(self):
+        """tests that at most capacity objects stay decoded and evicted
+        ones are read back from the log"""
+        states = [State(name=str(i)) for i in range(5)]
+        for state in states:
+            self.storage.new(state)
+        self.storage.save()
+        self.assertLessEqual(len(self.storage._BoundedStorage__objects), 2)
+        first = self.storage.get(State, states[0].id)
+        self.assertIsNot(first, states[0])
+        self.assertEqual(first.name, "0")
+        self.assertEqual(self.storage.count(State), 5)
+        names = sorted(obj.name for obj in self.storage.all(State).values())
+        self.assertEqual(names, ["0", "1", "2", "3", "4"])
+        self.assertEqual(len(self.storage.all()), 5)
+
+    def test_dirty_write_back(self):
+        """tests that changed objects are written before eviction"""
+        state = State(name="Old")
+        self.storage.new(state)
+        self.storage.save()
+        state.name = "New"
+        self.storage.new(state)
+        self.storage.new(City(name="A"))
+        self.storage.new(City(name="B"))
+        self.assertNotIn("State." + state.id,
+                         self.storage._BoundedStorage__pending)
+        self.storage.reload()
+        self.assertEqual(self.storage.get(State, state.id).name, "New")
+        self.assertEqual(self.storage.count(City), 0)
+
+    def test_checkpoint_and_torn_entry(self):
+        """tests that reload uses the checkpoint, scans the entries after
+        it and cuts a torn last entry"""
+        old = State(name="Checkpointed")
+        self.storage.new(old)
+        self.storage.save()
+        self.storage.close()
+        self.storage.reload()
+        self.assertTrue(os.path.exists(self.path + ".idx"))
+        new = State(name="Appended")
+        self.storage.new(new)
+        self.storage.save()
+        size = os.path.getsize(self.path)
+        with open(self.path, "ab") as f:
+            f.write(b"\x10\x00\x00")
+        self.storage._BoundedStorage__file.close()
+        self.storage._BoundedStorage__file = None
+        self.storage.reload()
+        self.assertEqual(os.path.getsize(self.path), size)
+        self.assertEqual(self.storage.get(State, old.id).name,
+                         "Checkpointed")
+        self.assertEqual(self.storage.get(State, new.id).name, "Appended")
+
+    def test_delete_and_compact(self):
+        """tests that deletions survive a reload and compaction drops
+        dead entries"""
+        keep = State(name="Keep")
+        gone = State(name="Gone")
+        self.storage.new(keep)
+        self.storage.new(gone)
+        self.storage.save()
+        self.storage.delete(gone)
+        self.storage.save()
+        size = os.path.getsize(self.path)
+        self.storage.compact()
+        self.assertLess(os.path.getsize(self.path), size)
+        self.storage.reload()
+        self.assertIsNone(self.storage.get(State, gone.id))
+        self.assertEqual(self.storage.get(State, keep.id).name, "Keep")
+
+    def test_transaction_rollback(self):
+        """tests that a failing transaction drops its changes"""
+        state = State(name="Maine")
+        self.storage.new(state)
+        with self.assertRaises(ValueError):
+            with self.storage.transaction():
+                self.storage.delete(state)
+                for i in range(3):
+                    self.storage.new(State(name="Gone"))
+                raise ValueError("abort")
+        self.assertEqual(self.storage.count(State), 1)
+        self.assertEqual(self.storage.get(State, state.id).name, "Maine")
+
+    def test_transaction_rollback_in_place(self):
+        """tests that a failing transaction restores the objects it
+        changed in place, and that they are still tracked after it"""
+        state = State(name="good")
+        self.storage.new(state)
+        self.storage.save()
+        with self.assertRaises(ValueError):
+            with self.storage.transaction():
+                state.name = "bad"
+                self.storage.changed(state, "name")
+                raise ValueError("abort")
+        self.assertIs(self.storage.get(State, state.id), state)
+        self.assertEqual(state.name, "good")
+        state.name = "later"
+        self.storage.changed(state, "name")
+        self.storage.save()
+        self.storage.close()
+        self.storage = BoundedStorage(self.path, capacity=2)
+        self.storage.reload()
+        self.assertEqual(self.storage.get(State, state.id).name, "later")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+#!/usr/bin/python3
+"""test for the file storage compression"""
+import unittest
+import pep8
+import io
+from models.engine import compression
+
+
+class TestCompression(unittest.TestCase):
+    '''this will test open_write and open_read'''
+
+    def test_pep8_compression(self):
+        """Tests pep8 style"""
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(['models/engine/compression.py'])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_round_trip(self):
+        """tests that every codec is detected and reads back its data"""
+        data = b'{"State.1":{"name":"California"}}' * 100
+        for codec in (None, "gzip", "bz2", "lzma"):
+            for level in (None, 1):
+                f = io.BytesIO()
+                out = compression.open_write(f, codec, level)
+                out.write(data)
+                if codec:
+                    out.close()
+                    self.assertFalse(f.closed)
+                    self.assertLess(len(f.getvalue()), len(data))
+                f = io.BufferedReader(io.BytesIO(f.getvalue()))
+                with compression.open_read(f) as out:
+                    self.assertEqual(out.read(), data)
+
+    def test_unknown_codec(self):
+        """tests that unknown codecs are refused"""
+        with self.assertRaises(ValueError):
+            compression.open_write(io.BytesIO(), "zip")
+
+
+if __name__ == "__main__":
+    unittest.main()
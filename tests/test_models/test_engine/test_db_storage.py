@@ -4,6 +4,7 @@ import unittest
 import pep8
 import json
 import os
+import models
 from models.base_model import BaseModel
 from models.user import User
 from models.state import State
@@ -11,7 +12,6 @@ from models.city import City
 from models.amenity import Amenity
 from models.place import Place
 from models.review import Review
-from models import storage
 from models.engine.db_storage import DBStorage
 
 
@@ -31,19 +31,19 @@ class TestDBStorage(unittest.TestCase):
 
     def test_all(self):
         """tests if all works in database Storage"""
-        obj = storage.all()
+        obj = models.storage.all()
         self.assertEqual(type(obj), dict)
 
     def test_all_class(self):
         """tests if all with class works in database Storage"""
-        storage.new(State(name='Hawaii'))
-        objs = storage.all()
-        u_objs = storage.all('User')
+        models.storage.new(State(name='Hawaii'))
+        objs = models.storage.all()
+        u_objs = models.storage.all('User')
         self.assertIsNotNone(objs)
         self.assertEqual(type(objs), dict)
         self.assertEqual(type(u_objs), dict)
-        self.assertEqual(objs, storage.all())
-        self.assertNotEqual(u_objs, storage.all())
+        self.assertEqual(objs, models.storage.all())
+        self.assertNotEqual(u_objs, models.storage.all())
         self.assertNotEqual(objs, u_objs)
 
     def test_delete(self):
@@ -51,33 +51,33 @@ class TestDBStorage(unittest.TestCase):
         u = User(email="Ya", password="lal", first_name="Hello",
                  last_name="Good bye")
         key = 'User' + '.' + u.id
-        objs = storage.all()
+        objs = models.storage.all()
         self.assertNotIn(key, objs)
-        storage.new(u)
-        storage.save()
-        objs = storage.all()
+        models.storage.new(u)
+        models.storage.save()
+        objs = models.storage.all()
         self.assertIn(key, objs)
-        storage.delete(u)
-        objs = storage.all()
+        models.storage.delete(u)
+        objs = models.storage.all()
         self.assertNotIn(key, objs)
 
     def test_new(self):
         """test when new is called"""
-        obj = storage.all()
+        obj = models.storage.all()
         s = State(name='New York')
-        self.assertIsNone(storage.new(s))
+        self.assertIsNone(models.storage.new(s))
 
     def test_save(self):
         """test when save is called"""
-        obj = storage.all()
+        obj = models.storage.all()
         s = State(name='Nevada')
-        storage.new(s)
-        self.assertIsNone(storage.save())
+        models.storage.new(s)
+        self.assertIsNone(models.storage.save())
 
     def test_reload_db(self):
         """Test DBStorage reload does not error out
         """
-        self.assertIsNone(storage.reload())
+        self.assertIsNone(models.storage.reload())
 
 if __name__ == "__main__":
     unittest.main()
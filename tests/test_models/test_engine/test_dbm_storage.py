@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+"""test for dbm storage"""
+import unittest
+import pep8
+import dbm
+import json
+import os
+import shutil
+import tempfile
+from models.state import State
+from models.city import City
+from models.engine.dbm_storage import DBMStorage
+
+
+class TestDBMStorage(unittest.TestCase):
+    '''this will test the DBMStorage'''
+
+    def setUp(self):
+        """Setup method"""
+        if os.getenv('HBNB_TYPE_STORAGE') == 'db':
+            self.skipTest("Using db storage")
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "file.dbm")
+        self.storage = DBMStorage(self.path)
+        self.storage.reload()
+
+    def tearDown(self):
+        """teardown"""
+        self.storage.close()
+        shutil.rmtree(self.tmp)
+
+    def test_pep8_DBMStorage(self):
+        """Tests pep8 style"""
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(['models/engine/dbm_storage.py'])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_save_writes_pending_keys(self):
+        """tests that save writes one record per changed object"""
+        s = State(name="Ohio")
+        c = City(name="Akron", state_id=s.id)
+        self.storage.new(s)
+        self.storage.new(c)
+        self.storage.save()
+        self.storage.close()
+        with dbm.open(self.path, 'r') as db:
+            self.assertEqual(sorted(k.decode() for k in db.keys()),
+                             sorted(["State." + s.id, "City." + c.id]))
+            self.assertEqual(json.loads(db["State." + s.id])["name"],
+                             "Ohio")
+
+    def test_reload_is_lazy(self):
+        """tests that reload indexes keys and decodes on demand"""
+        s = State(name="Iowa")
+        self.storage.new(s)
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(self.storage.count(State), 1)
+        self.assertEqual(self.storage._DBMStorage__objects, {})
+        self.assertEqual(self.storage.get("State", s.id).name, "Iowa")
+        self.assertEqual(list(self.storage.all(State)), ["State." + s.id])
+        self.assertEqual(self.storage.all(City), {})
+
+    def test_delete(self):
+        """tests that a deleted object is removed from the file"""
+        s = State(name="Utah")
+        self.storage.new(s)
+        self.storage.save()
+        self.storage.delete(s)
+        self.storage.save()
+        self.storage.reload()
+        self.assertIsNone(self.storage.get(State, s.id))
+        self.assertEqual(self.storage.count(), 0)
+
+    def test_transaction_rollback(self):
+        """tests that a failing transaction drops its changes"""
+        s = State(name="Maine")
+        self.storage.new(s)
+        with self.assertRaises(ValueError):
+            with self.storage.transaction():
+                self.storage.delete(s)
+                self.storage.new(State(name="Gone"))
+                raise ValueError("abort")
+        self.assertEqual(self.storage.count(State), 1)
+        self.assertEqual(self.storage.get(State, s.id).name, "Maine")
+
+    def test_transaction_rollback_in_place(self):
+        """tests that a failing transaction restores the objects it
+        changed in place, and that they are still tracked after it"""
+        state = State(name="good")
+        self.storage.new(state)
+        self.storage.save()
+        with self.assertRaises(ValueError):
+            with self.storage.transaction():
+                state.name = "bad"
+                self.storage.changed(state, "name")
+                raise ValueError("abort")
+        self.assertIs(self.storage.get(State, state.id), state)
+        self.assertEqual(state.name, "good")
+        state.name = "later"
+        self.storage.changed(state, "name")
+        self.storage.save()
+        self.storage.close()
+        self.storage = DBMStorage(self.path)
+        self.storage.reload()
+        self.assertEqual(self.storage.get(State, state.id).name, "later")
+
+
+if __name__ == "__main__":
+    unittest.main()
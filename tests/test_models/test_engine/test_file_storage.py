@@ -3,7 +3,12 @@
 import unittest
 import pep8
 import json
+import multiprocessing
 import os
+import shutil
+import tempfile
+import threading
+from unittest.mock import patch
 from models.base_model import BaseModel
 from models.user import User
 from models.state import State
@@ -12,6 +17,7 @@ from models.amenity import Amenity
 from models.place import Place
 from models.review import Review
 from models.engine.file_storage import FileStorage
+from models.engine import serializers
 
 
 class TestFileStorage(unittest.TestCase):
@@ -40,10 +46,12 @@ class TestFileStorage(unittest.TestCase):
 
     def tearDown(self):
         """teardown"""
-        try:
-            os.remove("file.json")
-        except Exception:
-            pass
+        for path in ("file.json", "file.json.journal", "file.json.lock",
+                     "file.json.cache"):
+            try:
+                os.remove(path)
+            except Exception:
+                pass
 
     def test_pep8_FileStorage(self):
         """Tests pep8 style"""
@@ -57,7 +65,8 @@ class TestFileStorage(unittest.TestCase):
         obj = storage.all()
         self.assertIsNotNone(obj)
         self.assertEqual(type(obj), dict)
-        self.assertIs(obj, storage._FileStorage__objects)
+        self.assertEqual(obj, storage._FileStorage__objects)
+        self.assertIsNot(obj, storage._FileStorage__objects)
 
     def test_all_class(self):
         """tests if all with class works in File Storage"""
@@ -73,6 +82,102 @@ class TestFileStorage(unittest.TestCase):
         self.assertNotEqual(u_objs, storage.all())
         self.assertNotEqual(objs, u_objs)
 
+    def test_all_class_index(self):
+        """tests that all with a class uses the per-class index"""
+        storage = FileStorage()
+        state = State()
+        key = "State." + state.id
+        self.assertIn(key, storage.all(State))
+        self.assertIn(key, storage.all("State"))
+        self.assertNotIn(key, storage.all(City))
+        self.assertEqual(storage.all("Nothing"), {})
+        for obj in storage.all(State).values():
+            self.assertIsInstance(obj, State)
+        storage.delete(state)
+        self.assertNotIn(key, storage.all(State))
+
+    def test_all_by_foreign_key(self):
+        """tests the reverse indexes behind the relationship properties"""
+        storage = FileStorage()
+        state = State(name="Texas")
+        other = State(name="Utah")
+        city = City(name="Austin", state_id=state.id)
+        storage.new(city)
+        key = "City." + city.id
+        self.assertEqual(list(storage.all_by(City, "state_id", state.id)),
+                         [key])
+        self.assertEqual(state.cities, [city])
+        city.state_id = other.id
+        self.assertEqual(state.cities, [])
+        self.assertEqual(other.cities, [city])
+        place = Place(city_id=city.id, user_id=self.user.id)
+        storage.new(place)
+        self.assertIn("Place." + place.id,
+                      storage.all_by("Place", "user_id", self.user.id))
+        self.assertIn("Place." + place.id,
+                      storage.all_by("Place", "name", None))
+        storage.delete(city)
+        self.assertEqual(other.cities, [])
+
+    def test_get_count(self):
+        """tests looking up one object and counting objects"""
+        state = State()
+        self.assertIs(self.storage.get(State, state.id), state)
+        self.assertIs(self.storage.get("State", state.id), state)
+        self.assertIsNone(self.storage.get("State", "nope"))
+        self.assertEqual(self.storage.count(State),
+                         len(self.storage.all(State)))
+        self.assertEqual(self.storage.count(), len(self.storage.all()))
+
+    @patch.object(FileStorage, "_FileStorage__seen", {})
+    def test_refresh(self):
+        """tests that refresh only reloads when the file changed"""
+        state = State()
+        self.storage.save()
+        self.assertFalse(self.storage.refresh())
+        self.assertIs(self.storage.get(State, state.id), state)
+        with open("file.json", 'r') as f:
+            records = json.load(f)
+        records["State.other"] = dict(records["State." + state.id],
+                                      id="other")
+        with open("file.json", 'w') as f:
+            json.dump(records, f)
+        self.assertTrue(self.storage.refresh())
+        self.assertEqual(self.storage.get(State, "other").id, "other")
+        self.assertFalse(self.storage.refresh())
+
+    def test_refresh_delta(self):
+        """tests that refresh only builds the records that changed and
+        updates their objects in place"""
+        with patch.multiple(FileStorage, _FileStorage__objects={},
+                            _FileStorage__classes={},
+                            _FileStorage__refs={},
+                            _FileStorage__cache={}):
+            same = State()
+            changed = City()
+            changed.state_id = same.id
+            gone = Amenity()
+            self.storage.save()
+            with open("file.json", 'r') as f:
+                records = json.load(f)
+            records["__generation__"] += 1
+            records["City." + changed.id].update(name="New",
+                                                 state_id="other")
+            del records["Amenity." + gone.id]
+            with open("file.json", 'w') as f:
+                json.dump(records, f, separators=(",", ":"))
+            with patch("models.state.State.__init__") as init:
+                self.assertTrue(self.storage.refresh())
+            init.assert_not_called()
+            self.assertIs(self.storage.get(State, same.id), same)
+            self.assertIs(self.storage.get(City, changed.id), changed)
+            self.assertEqual(changed.name, "New")
+            self.assertIn("City." + changed.id,
+                          self.storage.all_by(City, "state_id", "other"))
+            self.assertEqual(self.storage.all_by(City, "state_id", same.id),
+                             {})
+            self.assertIsNone(self.storage.get(Amenity, gone.id))
+
     def test_delete(self):
         """Tests if filestorage deletion works"""
         u = User(first_name="Hello", last_name="Good bye")
@@ -89,13 +194,12 @@ class TestFileStorage(unittest.TestCase):
     def test_new(self):
         """test when new is created"""
         storage = FileStorage()
-        obj = storage.all()
         user = User()
         user.id = 123455
         user.name = "Kevin"
         storage.new(user)
         key = user.__class__.__name__ + "." + str(user.id)
-        self.assertIsNotNone(obj[key])
+        self.assertIsNotNone(storage.all()[key])
 
     def test_reload_filestorage(self):
         """
@@ -125,6 +229,420 @@ class TestFileStorage(unittest.TestCase):
                 self.assertEqual(line, "{}")
         self.assertIs(self.storage.reload(), None)
 
+    def test_save_encodes_changed_only(self):
+        """tests that a save only encodes the objects changed since the
+        last save"""
+        user = User()
+        self.storage.save()
+        with patch.object(BaseModel, "to_dict", autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            user.first_name = "Dirty"
+            self.storage.save()
+        self.assertEqual(to_dict.call_count, 1)
+        with open("file.json", 'r') as f:
+            records = json.load(f)
+        self.assertEqual(records["User." + user.id]["first_name"], "Dirty")
+        records.pop("__generation__")
+        self.assertEqual(len(records), len(self.storage.all()))
+
+    def test_transaction_commit(self):
+        """tests that saves inside a transaction become one save"""
+        with patch.object(FileStorage, "save", autospec=True,
+                          side_effect=FileStorage.save) as save:
+            with self.storage.transaction():
+                for i in range(5):
+                    Place().save()
+                self.assertFalse(os.path.isfile("file.json"))
+        self.assertEqual(save.call_count, 6)
+        self.assertTrue(os.path.isfile("file.json"))
+
+    def test_transaction_rollback(self):
+        """tests that a failing transaction undoes its changes"""
+        state = State()
+        state.name = "Before"
+        city = City()
+        city.state_id = state.id
+        self.storage.save()
+        with self.assertRaises(ValueError):
+            with self.storage.transaction():
+                state.name = "After"
+                state.save()
+                self.storage.delete(city)
+                extra = Amenity()
+                raise ValueError("abort")
+        self.assertEqual(state.name, "Before")
+        self.assertIs(self.storage.all()["State." + state.id], state)
+        self.assertIn("City." + city.id, self.storage.all())
+        self.assertEqual([c.id for c in state.cities], [city.id])
+        self.assertNotIn("Amenity." + extra.id, self.storage.all())
+        with open("file.json", 'r') as f:
+            self.assertEqual(json.load(f)["State." + state.id]["name"],
+                             "Before")
+
+    def test_transaction_lock_order(self):
+        """tests that a transaction started while another thread saves
+        can still reload and compact"""
+        State().save()
+        dump = FileStorage._FileStorage__dump
+        dumping, entered, done = (threading.Event(), threading.Event(),
+                                  threading.Event())
+
+        def slow_dump(storage):
+            dumping.set()
+            entered.wait(0.5)
+            dump(storage)
+
+        def block():
+            with self.storage.transaction():
+                entered.set()
+                self.storage.reload()
+                self.storage.compact()
+            done.set()
+        with patch.object(FileStorage, "_FileStorage__dump", slow_dump):
+            saver = threading.Thread(target=self.storage.save, daemon=True)
+            saver.start()
+            self.assertTrue(dumping.wait(5))
+            threading.Thread(target=block, daemon=True).start()
+            self.assertTrue(done.wait(5))
+            saver.join()
+
+    @patch.object(FileStorage, "_FileStorage__layout", "journal")
+    def test_journal_save(self):
+        """tests that a save in journal layout only appends the change"""
+        self.storage.compact()
+        user = User(email="journal@hbnb.io")
+        key = "User." + user.id
+        user.save()
+        with open("file.json", 'r') as f:
+            self.assertNotIn(key, json.load(f))
+        with open("file.json.journal", 'r') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(records[-1]["key"], key)
+        self.assertEqual(records[-1]["value"]["email"], "journal@hbnb.io")
+        self.storage._FileStorage__remove(key)
+        self.storage.reload()
+        self.assertEqual(self.storage.all()[key].email, "journal@hbnb.io")
+        self.storage.delete(self.storage.all()[key])
+        self.storage.save()
+        self.storage.new(user)
+        self.storage.reload()
+        self.assertNotIn(key, self.storage.all())
+
+    @patch.object(FileStorage, "_FileStorage__layout", "journal")
+    def test_journal_compact(self):
+        """tests that compact folds the journal into the JSON file"""
+        user = User(email="compact@hbnb.io")
+        key = "User." + user.id
+        user.save()
+        self.assertTrue(os.path.isfile("file.json.journal"))
+        self.storage.compact()
+        self.assertFalse(os.path.isfile("file.json.journal"))
+        with open("file.json", 'r') as f:
+            self.assertIn(key, json.load(f))
+
+    @patch.object(FileStorage, "_FileStorage__layout", "journal")
+    def test_journal_compact_transaction(self):
+        """tests that compact inside a transaction waits for the block"""
+        self.storage.compact()
+        user = User(email="compact@hbnb.io")
+        user.save()
+        with self.storage.transaction():
+            user.email = "later@hbnb.io"
+            self.storage.compact()
+            self.assertTrue(os.path.isfile("file.json.journal"))
+            with open("file.json", 'r') as f:
+                self.assertNotIn("User." + user.id, json.load(f))
+        with open("file.json.journal", 'r') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(records[-1]["value"]["email"], "later@hbnb.io")
+
+    @patch.object(FileStorage, "_FileStorage__layout", "journal")
+    def test_journal_torn_record(self):
+        """tests that a torn last journal record is dropped on reload"""
+        self.storage.compact()
+        user = User(email="torn@hbnb.io")
+        user.save()
+        with open("file.json.journal", 'a') as f:
+            f.write('{"key": "User.torn", "va')
+        self.storage.reload()
+        self.assertNotIn("User.torn", self.storage.all())
+        with open("file.json.journal", 'r') as f:
+            self.assertTrue(f.read().endswith("\n"))
+
+    def test_sharded_layout(self):
+        """tests that saves only rewrite dirty shards and that per class
+        reads only load their own shard"""
+        shards = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, shards)
+        with patch.multiple(FileStorage, _FileStorage__layout="sharded",
+                            _FileStorage__shard_dir=shards,
+                            _FileStorage__loaded=set(),
+                            _FileStorage__all_loaded=False):
+            state = State(name="Sharded")
+            state.save()
+            self.assertEqual(os.listdir(shards), ["State.json"])
+            with open(os.path.join(shards, "State.json")) as f:
+                self.assertIn("State." + state.id, json.load(f))
+            amenity = Amenity(name="Wifi")
+            mtime = os.stat(os.path.join(shards, "State.json")).st_mtime_ns
+            amenity.save()
+            self.assertEqual(
+                os.stat(os.path.join(shards, "State.json")).st_mtime_ns,
+                mtime)
+            self.storage.delete(state)
+            FileStorage._FileStorage__loaded.clear()
+            self.assertNotIn("State." + state.id, self.storage.all(State))
+            self.assertEqual(FileStorage._FileStorage__loaded, {"State"})
+            self.storage.new(state)
+            FileStorage._FileStorage__pending.clear()
+            self.storage.delete(state)
+            self.storage.save()
+            with open(os.path.join(shards, "State.json")) as f:
+                self.assertNotIn("State." + state.id, json.load(f))
+            self.assertIn("Amenity." + amenity.id, self.storage.all())
+
+    def test_lazy_reload(self):
+        """tests that lazy reloads only build the objects asked for"""
+        state = State(name="Lazy")
+        city = City(name="Town", state_id=state.id)
+        with patch.multiple(FileStorage, _FileStorage__lazy=True,
+                            _FileStorage__raw={},
+                            _FileStorage__objects={},
+                            _FileStorage__classes={},
+                            _FileStorage__refs={}):
+            self.storage.new(state)
+            self.storage.new(city)
+            self.storage.save()
+            FileStorage._FileStorage__objects.clear()
+            FileStorage._FileStorage__classes.clear()
+            FileStorage._FileStorage__refs.clear()
+            self.storage.reload()
+            self.assertEqual(FileStorage._FileStorage__objects, {})
+            self.assertEqual(self.storage.count(State), 1)
+            lazy = self.storage.get(State, state.id)
+            self.assertEqual(lazy.name, "Lazy")
+            self.assertEqual(list(FileStorage._FileStorage__objects),
+                             ["State." + state.id])
+            self.storage.save()
+            with open("file.json") as f:
+                self.assertIn("City." + city.id, json.load(f))
+            self.assertEqual(lazy.cities[0].name, "Town")
+            self.assertNotIn("City", FileStorage._FileStorage__raw)
+
+    def test_file_format(self):
+        """tests that saves use the configured format and reloads detect
+        the format of the file"""
+        state = State()
+        with patch.object(FileStorage, "_FileStorage__serializer",
+                          serializers.get("marshal")), \
+                patch.dict(FileStorage._FileStorage__cache, clear=True):
+            self.storage.save()
+            with open("file.json", "rb") as f:
+                self.assertEqual(f.read(8), b"HBNBMSH1")
+        FileStorage._FileStorage__cache.clear()
+        self.storage.delete(state)
+        self.storage.reload()
+        self.assertEqual(self.storage.get(State, state.id).id, state.id)
+        self.storage.save()
+        with open("file.json") as f:
+            self.assertIn("State." + state.id, json.load(f))
+
+    def test_compression(self):
+        """tests that compressed saves are detected on reload"""
+        state = State()
+        with patch.object(FileStorage, "_FileStorage__compression", "gzip"):
+            self.storage.save()
+        with open("file.json", "rb") as f:
+            self.assertEqual(f.read(2), b"\x1f\x8b")
+        self.storage.delete(state)
+        self.storage.reload()
+        self.assertEqual(self.storage.get(State, state.id).id, state.id)
+
+    def test_generation(self):
+        """tests that every save bumps the generation of the file"""
+        self.storage.save()
+        with open("file.json") as f:
+            generation = json.load(f)["__generation__"]
+        self.storage.save()
+        with open("file.json") as f:
+            self.assertEqual(json.load(f)["__generation__"], generation + 1)
+
+    def test_save_merges_other_writer(self):
+        """tests that a save keeps what another process saved meanwhile
+        and applies the pending changes over it"""
+        user = User()
+        self.storage.save()
+        with open("file.json") as f:
+            records = json.load(f)
+        records["__generation__"] += 1
+        records["State.other"] = dict(records["User." + user.id],
+                                      __class__="State", id="other")
+        records["User." + user.id]["first_name"] = "Theirs"
+        with open("file.json.tmp", 'w') as f:
+            json.dump(records, f)
+        os.replace("file.json.tmp", "file.json")
+        user.first_name = "Mine"
+        self.storage.save()
+        with open("file.json") as f:
+            records = json.load(f)
+        self.assertIn("State.other", records)
+        self.assertEqual(records["User." + user.id]["first_name"], "Mine")
+        self.assertEqual(self.storage.get(State, "other").id, "other")
+        self.storage.delete(self.storage.get(State, "other"))
+        self.storage.save()
+
+    def test_bgsave(self):
+        """tests that bgsave writes the file from a child process while
+        changes made meanwhile stay pending"""
+        user = User()
+        self.assertTrue(self.storage.bgsave())
+        state = State()
+        self.storage.save()
+        stats = self.storage.stats()
+        self.assertFalse(stats["bgsave_in_progress"])
+        self.assertEqual(stats["last_bgsave_status"], "ok")
+        self.assertGreaterEqual(stats["last_bgsave_duration"], 0)
+        self.assertFalse(self.storage.refresh())
+        with open("file.json") as f:
+            records = json.load(f)
+        self.assertIn("User." + user.id, records)
+        self.assertIn("State." + state.id, records)
+
+    def test_bgsave_rollback(self):
+        """tests that a transaction rolled back after a bgsave keeps the
+        objects it saved, even without their cached entries"""
+        state = State()
+        state.name = "A"
+        self.assertTrue(self.storage.bgsave())
+        FileStorage._FileStorage__bgsave_thread.join()
+        for cold in (False, True):
+            if cold:
+                FileStorage._FileStorage__cache.pop("State." + state.id)
+            with self.assertRaises(ValueError):
+                with self.storage.transaction():
+                    state.name = "B"
+                    raise ValueError("abort")
+            self.assertIs(self.storage.get(State, state.id), state)
+            self.assertEqual(state.name, "A")
+
+    def test_bgsave_failure(self):
+        """tests that the changes of a failed bgsave are pending again"""
+        user = User()
+        with patch.object(FileStorage, "_FileStorage__entries",
+                          side_effect=OSError):
+            self.assertTrue(self.storage.bgsave())
+            FileStorage._FileStorage__bgsave_thread.join()
+        self.assertEqual(self.storage.stats()["last_bgsave_status"], "err")
+        self.assertIn("User." + user.id, FileStorage._FileStorage__pending)
+
+    def test_startup_cache(self):
+        """tests that reloads of an unchanged file unpickle the startup
+        cache and reloads of a changed file read it"""
+        with patch.object(FileStorage, "_FileStorage__startup_cache", True):
+            state = State()
+            state.name = "Cached"
+            self.storage.save()
+            self.storage.reload()
+            self.assertTrue(os.path.exists("file.json.cache"))
+            with patch("models.state.State.__init__") as init:
+                self.storage.reload()
+            init.assert_not_called()
+            self.assertEqual(self.storage.get(State, state.id).name,
+                             "Cached")
+            with open("file.json") as f:
+                records = json.load(f)
+            records["State." + state.id]["name"] = "Changed"
+            with open("file.json", 'w') as f:
+                json.dump(records, f)
+            self.storage.reload()
+            self.assertEqual(self.storage.get(State, state.id).name,
+                             "Changed")
+            state = self.storage.get(State, state.id)
+            state.name = "Saved"
+            mtime = os.stat("file.json.cache").st_mtime_ns
+            self.storage.save()
+            self.assertEqual(os.stat("file.json.cache").st_mtime_ns, mtime)
+            self.storage._FileStorage__flush_cache()
+            with patch("models.state.State.__init__") as init:
+                self.storage.reload()
+            init.assert_not_called()
+            self.assertEqual(self.storage.get(State, state.id).name,
+                             "Saved")
+
+    def test_workers(self):
+        """tests that reloads and saves split over worker processes keep
+        every object"""
+        with patch.multiple(FileStorage, _FileStorage__workers=2,
+                            _FileStorage__chunk=2,
+                            _FileStorage__cache={}):
+            states = [State() for i in range(5)]
+            states[0].name = "First"
+            self.storage.save()
+            count = self.storage.count()
+            with open("file.json") as f:
+                records = json.load(f)
+            self.assertEqual(len(records), count + 1)
+            self.storage.reload()
+            self.assertEqual(self.storage.count(), count)
+            self.assertEqual(self.storage.get(State, states[0].id).name,
+                             "First")
+
+    def test_processes(self):
+        """tests that processes saving at once lose no object"""
+        def work():
+            for i in range(10):
+                Amenity().save()
+        self.storage.save()
+        before = self.storage.count(Amenity)
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=work) for i in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+            self.assertEqual(worker.exitcode, 0)
+        self.assertTrue(self.storage.refresh())
+        self.assertEqual(self.storage.count(Amenity), before + 30)
+
+    def test_threads(self):
+        """tests that threads can create, read and save at once, and
+        iterate every object while others create them"""
+        errors = []
+        done = threading.Event()
+
+        def work():
+            try:
+                for i in range(50):
+                    Amenity().save()
+                    for obj in self.storage.all(Amenity).values():
+                        str(obj)
+                    self.storage.count(Amenity)
+            except Exception as e:
+                errors.append(e)
+
+        def scan():
+            try:
+                while not done.is_set():
+                    for key, obj in self.storage.all().items():
+                        obj.id
+            except Exception as e:
+                errors.append(e)
+        before = self.storage.count(Amenity)
+        threads = [threading.Thread(target=work) for i in range(4)]
+        scanner = threading.Thread(target=scan)
+        scanner.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        done.set()
+        scanner.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.storage.count(Amenity), before + 200)
+        with open("file.json") as f:
+            saved = [key for key in json.load(f) if key.startswith("Amen")]
+        self.assertEqual(len(saved), before + 200)
+
 
 if __name__ == "__main__":
     unittest.main()
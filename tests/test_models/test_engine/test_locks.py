@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+"""test for the readers-writer lock"""
+import unittest
+import pep8
+import os
+import shutil
+import tempfile
+import threading
+from models.engine.locks import FileLock, RWLock
+
+
+class TestRWLock(unittest.TestCase):
+    '''this will test RWLock'''
+
+    def setUp(self):
+        """Setup method"""
+        self.lock = RWLock()
+
+    def test_pep8_locks(self):
+        """Tests pep8 style"""
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(['models/engine/locks.py'])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_readers_share(self):
+        """tests that readers hold the lock together"""
+        both = threading.Barrier(2, timeout=5)
+
+        def reader():
+            with self.lock.read():
+                both.wait()
+        thread = threading.Thread(target=reader)
+        thread.start()
+        reader()
+        thread.join()
+
+    def test_writer_excludes(self):
+        """tests that a writer waits for readers and readers for it"""
+        events = []
+        reading = threading.Event()
+
+        def writer():
+            reading.wait()
+            with self.lock.write():
+                events.append("write")
+        thread = threading.Thread(target=writer)
+        with self.lock.read():
+            thread.start()
+            reading.set()
+            thread.join(0.1)
+            events.append("read")
+        thread.join()
+        self.assertEqual(events, ["read", "write"])
+
+    def test_reentrant(self):
+        """tests that writers reenter and read, readers cannot write"""
+        with self.lock.write():
+            with self.lock.write():
+                with self.lock.read():
+                    pass
+        with self.lock.read():
+            with self.lock.read():
+                with self.assertRaises(RuntimeError):
+                    with self.lock.write():
+                        pass
+
+
+class TestFileLock(unittest.TestCase):
+    '''this will test FileLock'''
+
+    def setUp(self):
+        """Setup method"""
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "file.json.lock")
+        self.lock = FileLock()
+
+    def tearDown(self):
+        """teardown"""
+        shutil.rmtree(self.tmp)
+
+    def test_lock_file(self):
+        """tests that only writers create the lock file"""
+        with self.lock.shared(self.path):
+            with self.lock.shared(self.path):
+                pass
+        self.assertFalse(os.path.exists(self.path))
+        with self.lock.exclusive(self.path):
+            with self.lock.shared(self.path):
+                pass
+        self.assertTrue(os.path.exists(self.path))
+        with self.lock.shared(self.path):
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
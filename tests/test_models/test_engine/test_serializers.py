@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""test for the file storage serializers"""
+import unittest
+import pep8
+import io
+import json
+from models.engine import serializers
+
+
+class TestSerializers(unittest.TestCase):
+    '''this will test the record formats'''
+
+    def setUp(self):
+        """Setup method"""
+        self.data = {"User.1": {"id": "1", "__class__": "User",
+                                "first_name": "Kév \"Yo\"", "age": 20},
+                     "State.2": {"id": "2", "__class__": "State",
+                                 "name": "CA", "created_at": 1}}
+
+    def test_pep8_serializers(self):
+        """Tests pep8 style"""
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(['models/engine/serializers.py'])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_round_trip(self):
+        """tests that every format reads back what it wrote and is
+        detected from its first bytes"""
+        for name in serializers.serializers:
+            serializer = serializers.get(name)
+            entries = [serializer.entry(key, value)
+                       for key, value in self.data.items()]
+            f = io.BytesIO()
+            serializer.write(f, entries)
+            f = io.BufferedReader(io.BytesIO(f.getvalue()))
+            self.assertIs(serializers.detect(f), serializer)
+            items = list(serializer.read(f))
+            self.assertEqual([(key, value) for key, value, entry in items],
+                             list(self.data.items()))
+            self.assertEqual([entry for key, value, entry in items],
+                             entries)
+            self.assertEqual(serializer.decode("User.1", entries[0]),
+                             self.data["User.1"])
+            self.assertEqual(
+                json.loads(serializer.to_json("User.1", entries[0])),
+                self.data["User.1"])
+
+    def test_json_compact(self):
+        """tests that the JSON format is a plain compact JSON object"""
+        serializer = serializers.get("json")
+        f = io.BytesIO()
+        serializer.write(f, [serializer.entry(key, value)
+                             for key, value in self.data.items()])
+        text = f.getvalue().decode()
+        self.assertEqual(json.loads(text), self.data)
+        self.assertNotIn(", ", text)
+
+    def test_unknown_format(self):
+        """tests that unknown formats are refused"""
+        with self.assertRaises(ValueError):
+            serializers.get("yaml")
+        f = io.BufferedReader(io.BytesIO(b"HBNBMSH1\x05\x00"))
+        with self.assertRaises(ValueError):
+            list(serializers.get("marshal").read(f))
+
+
+if __name__ == "__main__":
+    unittest.main()
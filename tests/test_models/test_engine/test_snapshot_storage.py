@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+"""test for snapshot storage"""
+import unittest
+import pep8
+import os
+import shutil
+import tempfile
+from models.state import State
+from models.city import City
+from models.user import User
+from models.engine.snapshot_storage import SnapshotStorage, export
+
+
+class TestSnapshotStorage(unittest.TestCase):
+    '''this will test the SnapshotStorage'''
+
+    def setUp(self):
+        """Setup method"""
+        if os.getenv('HBNB_TYPE_STORAGE') == 'db':
+            self.skipTest("Using db storage")
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "file.snap")
+        self.state = State(name="Nevada")
+        self.cities = [City(name=name, state_id=self.state.id)
+                       for name in ("Reno", "Elko", "Ely")]
+        objs = {"City." + c.id: c for c in self.cities}
+        objs["State." + self.state.id] = self.state
+        export(objs, self.path)
+        self.storage = SnapshotStorage(self.path)
+        self.storage.reload()
+
+    def tearDown(self):
+        """teardown"""
+        self.storage.close()
+        shutil.rmtree(self.tmp)
+
+    def test_pep8_SnapshotStorage(self):
+        """Tests pep8 style"""
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(['models/engine/snapshot_storage.py'])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_get(self):
+        """tests point lookups and that they decode a single record"""
+        obj = self.storage.get(State, self.state.id)
+        self.assertEqual(obj.name, "Nevada")
+        self.assertEqual(obj.created_at, self.state.created_at)
+        self.assertIsNone(self.storage.get(State, "nope"))
+        self.assertEqual(len(self.storage._SnapshotStorage__objects), 1)
+
+    def test_all_count(self):
+        """tests per class ranges"""
+        self.assertEqual(self.storage.count(), 4)
+        self.assertEqual(self.storage.count(City), 3)
+        self.assertEqual(self.storage.count(User), 0)
+        self.assertEqual(sorted(self.storage.all("City")),
+                         sorted("City." + c.id for c in self.cities))
+        self.assertEqual(len(self.storage.all()), 4)
+        self.assertEqual(len(self.storage.all_by("City", "state_id",
+                                                 self.state.id)), 3)
+
+    def test_read_only(self):
+        """tests that writes are refused"""
+        with self.assertRaises(PermissionError):
+            self.storage.new(State(name="Nope"))
+        with self.assertRaises(PermissionError):
+            self.storage.save()
+
+    def test_refresh(self):
+        """tests that a new export is picked up"""
+        self.assertFalse(self.storage.refresh())
+        export({}, self.path)
+        self.assertTrue(self.storage.refresh())
+        self.assertEqual(self.storage.count(), 0)
+
+
+class TestExport(unittest.TestCase):
+    '''this will test export() under every storage type'''
+
+    def setUp(self):
+        """Setup method"""
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "file.snap")
+
+    def tearDown(self):
+        """teardown"""
+        shutil.rmtree(self.tmp)
+
+    def test_export_records(self):
+        """tests that records are written as file storage writes them"""
+        state = State(name="Nevada")
+        export({"State." + state.id: state}, self.path)
+        storage = SnapshotStorage(self.path)
+        storage.reload()
+        obj = storage.get(State, state.id)
+        self.assertEqual(obj.name, "Nevada")
+        self.assertEqual(obj.created_at, state.created_at)
+        storage.close()
+
+    def test_export_failure(self):
+        """tests that a failed export leaves no temporary file"""
+        state = State(name="Nevada")
+        state.__dict__["tags"] = {"not", "json"}
+        with self.assertRaises(TypeError):
+            export({"State." + state.id: state}, self.path)
+        self.assertEqual(os.listdir(self.tmp), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+"""test for sqlite storage"""
+import unittest
+import pep8
+import os
+import shutil
+import tempfile
+from sqlalchemy import text
+from models.state import State
+from models.city import City
+from models.engine.sqlite_storage import SQLiteStorage
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    '''this will test the SQLiteStorage'''
+
+    def setUp(self):
+        """Setup method"""
+        if os.getenv('HBNB_TYPE_STORAGE') != 'db':
+            self.skipTest("Using file storage")
+        self.tmp = tempfile.mkdtemp()
+        self.storage = SQLiteStorage(os.path.join(self.tmp, "hbnb.db"))
+        self.storage.reload()
+
+    def tearDown(self):
+        """teardown"""
+        self.storage._DBStorage__session.close()
+        self.storage._DBStorage__engine.dispose()
+        shutil.rmtree(self.tmp)
+
+    def test_pep8_SQLite_Storage(self):
+        """Tests pep8 style"""
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(['models/engine/sqlite_storage.py'])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_wal(self):
+        """tests that the database file uses write-ahead logging"""
+        with self.storage._DBStorage__engine.connect() as conn:
+            mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+        self.assertEqual(mode, "wal")
+
+    def test_save_get(self):
+        """tests that saved objects can be read back"""
+        s = State(name="Oregon")
+        self.storage.new(s)
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(self.storage.get(State, s.id).name, "Oregon")
+        self.assertEqual(self.storage.count("State"), 1)
+        self.assertIn("State." + s.id, self.storage.all("State"))
+
+    def test_iter(self):
+        """tests that iter yields every object of a class in batches"""
+        states = [State(name=str(i)) for i in range(5)]
+        for state in states:
+            self.storage.new(state)
+        self.storage.new(City(name="Boise", state_id=states[0].id))
+        self.storage.save()
+        objects = self.storage.iter(State, batch_size=2)
+        self.assertEqual(sorted(obj.id for obj in objects),
+                         sorted(state.id for state in states))
+        self.assertEqual(len(list(self.storage.iter())), 6)
+        self.assertEqual(list(self.storage.iter("BaseModel")), [])
+
+    def test_page(self):
+        """tests that pages follow each other through their cursors,
+        ordered by an indexed column then id"""
+        states = [State(name=str(i)) for i in range(5)]
+        for state in states:
+            self.storage.new(state)
+        self.storage.save()
+        ids = []
+        objs, cursor = self.storage.page(State, limit=2)
+        while cursor is not None:
+            ids.extend(obj.id for obj in objs)
+            self.assertEqual(len(objs), 2)
+            objs, cursor = self.storage.page(State, after=cursor, limit=2)
+        ids.extend(obj.id for obj in objs)
+        self.assertEqual(ids, sorted(state.id for state in states))
+        pages = []
+        cursor = None
+        while True:
+            objs, cursor = self.storage.page(State, after=cursor, limit=3,
+                                             order_by="created_at")
+            pages.append(objs)
+            if cursor is None:
+                break
+        self.assertEqual([len(objs) for objs in pages], [3, 2])
+        order = sorted(states, key=lambda state: (state.created_at,
+                                                  state.id))
+        self.assertEqual(pages[0] + pages[1], order)
+        with self.assertRaises(ValueError):
+            self.storage.page(State, order_by="name")
+        objs, cursor = self.storage.page(State, limit=2)
+        with self.assertRaises(ValueError):
+            self.storage.page(State, after=cursor, order_by="created_at")
+        with self.assertRaises(ValueError):
+            self.storage.page(State, after="bm90IGpzb24=")
+        for limit in (0, -1):
+            with self.assertRaises(ValueError):
+                self.storage.page(State, limit=limit)
+
+    def test_transaction_rollback(self):
+        """tests that a failing transaction leaves no rows behind"""
+        with self.assertRaises(ValueError):
+            with self.storage.transaction():
+                s = State(name="Idaho")
+                self.storage.new(s)
+                self.storage.new(City(name="Boise", state_id=s.id))
+                self.storage.save()
+                raise ValueError("abort")
+        self.assertEqual(self.storage.count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""test for the streaming JSON reader"""
+import unittest
+import pep8
+import io
+import json
+from models.engine.streaming import iter_items
+
+
+class TestStreaming(unittest.TestCase):
+    '''this will test iter_items'''
+
+    def setUp(self):
+        """Setup method"""
+        self.data = {"User.1": {"id": "1", "__class__": "User",
+                                "first_name": "Kév \"Yo\""},
+                     "State.2": {"id": "2", "__class__": "State",
+                                 "name": "CA"},
+                     'odd\\"key': {}}
+
+    def test_pep8_streaming(self):
+        """Tests pep8 style"""
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(['models/engine/streaming.py'])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_iter_items(self):
+        """tests that every entry comes back in order"""
+        for text in (json.dumps(self.data),
+                     json.dumps(self.data, indent=4, ensure_ascii=False),
+                     json.dumps(self.data, separators=(',', ':'))):
+            for size in (1, 5, 4096):
+                items = list(iter_items(io.StringIO(text), size))
+                self.assertEqual(items, list(self.data.items()))
+
+    def test_iter_items_raw(self):
+        """tests that raw entries are the source text of each entry"""
+        text = json.dumps(self.data)
+        entries = [entry for key, value, entry in
+                   iter_items(io.StringIO(text), 3, raw=True)]
+        self.assertEqual("{" + ", ".join(entries) + "}", text)
+
+    def test_iter_items_scan(self):
+        """tests that entries are found without decoding the values"""
+        data = dict(self.data, **{"Place.3": {"name": "a}b{c\\}"},
+                                  "Place.4": {"amenities": {"a": [1]}},
+                                  "__generation__": 3})
+        for text in (json.dumps(data),
+                     json.dumps(data, separators=(',', ':'))):
+            for size in (1, 5, 4096):
+                expected = [(key, None, entry) for key, value, entry in
+                            iter_items(io.StringIO(text), size, raw=True)]
+                self.assertEqual(list(iter_items(io.StringIO(text), size,
+                                                 raw=True, decode=False)),
+                                 expected)
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_items(io.StringIO(json.dumps(data)[:-3]), 8,
+                            decode=False))
+
+    def test_iter_items_empty(self):
+        """tests an empty object"""
+        for text in ("{}", " {\n} "):
+            self.assertEqual(list(iter_items(io.StringIO(text), 1)), [])
+
+    def test_iter_items_truncated(self):
+        """tests that a truncated file raises"""
+        text = json.dumps(self.data)[:-3]
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_items(io.StringIO(text), 8))
+
+
+if __name__ == "__main__":
+    unittest.main()
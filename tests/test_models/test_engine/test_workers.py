@@ -0,0 +1,54 @@
+#!/usr/bin/python3
+"""test for the worker processes"""
+import unittest
+import pep8
+import os
+from models.base_model import BaseModel
+from models.engine import serializers, workers
+
+
+class TestWorkers(unittest.TestCase):
+    '''this will test the worker processes'''
+
+    def setUp(self):
+        """Setup method"""
+        if os.getenv('HBNB_TYPE_STORAGE') == 'db':
+            self.skipTest("Using db storage")
+        if not workers.available():
+            self.skipTest("fork is not available")
+        self.serializer = serializers.get("json")
+
+    def test_pep8_workers(self):
+        """Tests pep8 style"""
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(['models/engine/workers.py'])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_encode_build(self):
+        """tests that chunks are worked on in order and records make the
+        round trip"""
+        objs = {}
+        for i in range(7):
+            obj = BaseModel(id=str(i), name=str(i),
+                            created_at="2017-09-28T21:03:54.052298",
+                            updated_at="2017-09-28T21:03:54.052302")
+            objs["BaseModel." + obj.id] = obj
+        keys = list(objs)
+        chunks = [keys[i:i + 2] for i in range(0, len(keys), 2)]
+        done = list(workers.parallel(workers.encode, chunks, 2,
+                                     self.serializer, objs))
+        self.assertEqual([chunk for chunk, entries in done], chunks)
+        entries = [entry for chunk, result in done for entry in result]
+        self.assertEqual(entries, [
+            self.serializer.entry(key, obj.to_dict())
+            for key, obj in objs.items()])
+        records = [[(key, None, entry)] for key, entry in zip(keys, entries)]
+        built = [obj for chunk, result in workers.parallel(
+            workers.build, records, 3, self.serializer,
+            classes={"BaseModel": BaseModel}) for obj in result]
+        self.assertEqual([obj.to_dict() for obj in built],
+                         [obj.to_dict() for obj in objs.values()])
+
+
+if __name__ == "__main__":
+    unittest.main()